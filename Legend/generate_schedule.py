@@ -3,6 +3,12 @@ import sys
 import os
 import unicodedata
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from html_template import (
+    TEAM_BADGE, SCHEDULE_PC_ROW, SCHEDULE_MOBILE_ROW, SCHEDULE_MOBILE_BYE_ROW, RECORD_PILL,
+)
+from team_records import POSTSEASON_WEEKS, record_splits
+
 # ==== 入力チェック ====
 if len(sys.argv) < 2:
     print("[使い方] generate_schedule.py [試合CSVファイル]")
@@ -12,45 +18,6 @@ csv_path = sys.argv[1]
 script_dir = os.path.dirname(os.path.abspath(__file__))
 color_path = os.path.join(script_dir, "team_color.xlsx")
 
-# ポストシーズンの識別子（NotionのWeek列と一致させる）
-POSTSEASON_WEEKS = ["WC", "DIV", "CONF", "SB"]
-
-TEAM_INFO = {
-    "JAX": ("AFC", "South"),
-    "HOU": ("AFC", "South"),
-    "IND": ("AFC", "South"),
-    "TEN": ("AFC", "South"),
-    "BUF": ("AFC", "East"),
-    "MIA": ("AFC", "East"),
-    "NYJ": ("AFC", "East"),
-    "NE": ("AFC", "East"),
-    "BAL": ("AFC", "North"),
-    "PIT": ("AFC", "North"),
-    "CLE": ("AFC", "North"),
-    "CIN": ("AFC", "North"),
-    "KC": ("AFC", "West"),
-    "LAC": ("AFC", "West"),
-    "DEN": ("AFC", "West"),
-    "LV": ("AFC", "West"),
-    "PHI": ("NFC", "East"),
-    "DAL": ("NFC", "East"),
-    "NYG": ("NFC", "East"),
-    "WAS": ("NFC", "East"),
-    "GB": ("NFC", "North"),
-    "MIN": ("NFC", "North"),
-    "CHI": ("NFC", "North"),
-    "DET": ("NFC", "North"),
-    "TB": ("NFC", "South"),
-    "NO": ("NFC", "South"),
-    "ATL": ("NFC", "South"),
-    "CAR": ("NFC", "South"),
-    "SF": ("NFC", "West"),
-    "SEA": ("NFC", "West"),
-    "LAR": ("NFC", "West"),
-    "ARI": ("NFC", "West"),
-}
-JAX_CONF, JAX_DIV = "AFC", "South"
-
 # ==== データ読み込み ====
 schedule_df = pd.read_csv(csv_path, dtype=str)
 colors_df = pd.read_excel(color_path)
@@ -101,69 +68,33 @@ schedule_df["date"] = schedule_df["datetime"].dt.strftime("%Y/%m/%d")
 schedule_df["time"] = schedule_df["datetime"].dt.strftime("%H:%M")
 
 
-def _cnt(df):
-    if df.empty:
-        return ""
-    w, l, t = (df["win"] == "Win").sum(), (df["win"] == "Lose").sum(), (df["win"] == "Draw").sum()
-    return f"{int(w)}-{int(l)}" + (f"-{int(t)}" if t > 0 else "")
-
-
 def build_schedule_record_bar(df):
-    reg = df[~df["week"].astype(str).str.startswith("Pre") & ~df["week"].isin(POSTSEASON_WEEKS)].copy()
-    played = reg[reg["win"].isin(["Win", "Lose", "Draw"])].copy()
-    if played.empty:
+    splits = record_splits(df)
+    if not splits.games:
         return '<div id="schedule-record-bar"><div class="jax-record-inner"><div class="jax-record-main"><span class="jax-record-team">JAX</span><span class="jax-record-overall">0-0</span></div></div></div>'
 
-    overall = _cnt(played)
-    conf_div = played["opponent"].map(lambda t: TEAM_INFO.get(str(t), (None, None))).apply(pd.Series)
-    conf_div.columns = ["_conf", "_div"]
-    played = played.join(conf_div)
-
-    div_rec = _cnt(played[(played["_conf"] == JAX_CONF) & (played["_div"] == JAX_DIV)])
-    conf_rec = _cnt(played[played["_conf"] == JAX_CONF])
-    nfc_rec = _cnt(played[played["_conf"] == "NFC"])
-    h_rec = _cnt(played[played["home"] == "Home"])
-    a_rec = _cnt(played[played["home"] == "Away"])
+    overall, div_rec = splits.overall, splits.division
+    conf_rec, nfc_rec, h_rec, a_rec = splits.conference, splits.nfc, splits.home, splits.away
 
     # Streakの計算
     streak_html = ""
-    res_list = [r for r in played["win"].tolist() if r in ("Win", "Lose", "Draw")]
-    if res_list:
-        last, count = res_list[-1], 0
-        for r in reversed(res_list):
-            if r == last:
-                count += 1
-            else:
-                break
-        if count >= 2:
-            code = {"Win": "W", "Lose": "L", "Draw": "D"}.get(last, "")
-            cls = "jax-record-pill jax-record-streak" + (
-                " jax-record-streak-loss" if code == "L" else " jax-record-streak-draw" if code == "D" else ""
-            )
-            streak_html = f"<span class='{cls}'><span class='jax-record-label'>Streak</span> <span class='jax-record-num'>{code}{count}</span></span>"
-
-    pills = []
-    if conf_rec:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Conference</span> <span class='jax-record-num'>{conf_rec}</span></span>"
-        )
-    if nfc_rec:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>NFC</span> <span class='jax-record-num'>{nfc_rec}</span></span>"
-        )
-    if h_rec:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Home</span> <span class='jax-record-num'>{h_rec}</span></span>"
-        )
-    if a_rec:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Away</span> <span class='jax-record-num'>{a_rec}</span></span>"
+    if splits.streak_count >= 2:
+        code, count = splits.streak_code, splits.streak_count
+        cls = "jax-record-pill jax-record-streak" + (
+            " jax-record-streak-loss" if code == "L" else " jax-record-streak-draw" if code == "D" else ""
         )
+        streak_html = RECORD_PILL.render({"cls": cls, "label": "Streak", "num": f"{code}{count}"})
+
+    pills = [
+        RECORD_PILL.render({"cls": "jax-record-pill", "label": label, "num": num})
+        for label, num in [("Conference", conf_rec), ("NFC", nfc_rec), ("Home", h_rec), ("Away", a_rec)]
+        if num
+    ]
     if streak_html:
         pills.append(streak_html)
 
     div_pill = (
-        f"<span class='jax-record-pill jax-record-pill-division'><span class='jax-record-label'>Division</span> <span class='jax-record-num'>{div_rec}</span></span>"
+        RECORD_PILL.render({"cls": "jax-record-pill jax-record-pill-division", "label": "Division", "num": div_rec})
         if div_rec
         else ""
     )
@@ -171,30 +102,28 @@ def build_schedule_record_bar(df):
 
 
 def build_table(df, is_pc):
+    rows = df.to_dict("records")
     if is_pc:
         html = '<div class="schedule-desktop"><table class="schedule-table"><thead><tr><th>Week</th><th>Date & Time</th><th>Opponent</th><th>Home/Away</th><th>Score</th><th>Result</th></tr></thead><tbody>'
-        for _, r in df.iterrows():
-            opp = (
-                "BYE"
-                if str(r["opponent"]).upper() == "BYE"
-                else f'<span class="team-badge" style="background:{r.get("bg","#ccc")};color:{r.get("fg","#000")};">{r["opponent"]}</span>'
+        for r in rows:
+            r["opp"] = "BYE" if str(r["opponent"]).upper() == "BYE" else TEAM_BADGE.render(r)
+        return html + SCHEDULE_PC_ROW.join(rows) + "</tbody></table></div>"
+
+    parts = ['<div class="schedule-mobile"><table class="schedule-table mobile-compact"><thead><tr><th>Week</th><th>Date</th><th>Opponent</th><th>Score</th></tr></thead><tbody>']
+    for r in rows:
+        if str(r.get("opponent", "")).upper() == "BYE":
+            parts.append(SCHEDULE_MOBILE_BYE_ROW.render(r))
+        else:
+            r["sym"] = "vs" if r["venue_class"] == "home" else "@"
+            r["result_tag"] = (
+                f'<small class="result {r["class"]}">{r["result"]}</small>'
+                if r["result"] in ["W", "L", "D"]
+                else ""
             )
-            html += f'<tr class="{r["class"]}"><th scope="row">{r["week"]}</th><td>{r["datetime_str"]}</td><td>{opp}</td><td class="venue {r["venue_class"]}">{r["home"]}</td><td>{r["score"]}</td><td>{r["result"]}</td></tr>'
-    else:
-        html = '<div class="schedule-mobile"><table class="schedule-table mobile-compact"><thead><tr><th>Week</th><th>Date</th><th>Opponent</th><th>Score</th></tr></thead><tbody>'
-        for _, r in df.iterrows():
-            if str(r.get("opponent", "")).upper() == "BYE":
-                html += f'<tr class="{r["class"]}"><td>{r["week"]}</td><td></td><td>BYE</td><td></td></tr>'
-            else:
-                sym = "vs" if r["venue_class"] == "home" else "@"
-                res = (
-                    f'<small class="result {r["class"]}">{r["result"]}</small>'
-                    if r["result"] in ["W", "L", "D"]
-                    else ""
-                )
-                opp = f'<span class="venue {r["venue_class"]}">{sym}</span><span class="team-badge" style="background:{r.get("bg","#ccc")}; color:{r.get("fg","#000")};">{r["opponent"]}</span>'
-                html += f'<tr class="{r["class"]}"><td>{r["week"]}</td><td>{r["date"]}<br><small>{r["time"] or "TBD"}</small></td><td>{opp}</td><td>{r["score"]}<br>{res}</td></tr>'
-    return html + "</tbody></table></div>"
+            r["time"] = r["time"] or "TBD"
+            parts.append(SCHEDULE_MOBILE_ROW.render(r))
+    parts.append("</tbody></table></div>")
+    return "".join(parts)
 
 
 pre_df = schedule_df[schedule_df["week"].astype(str).str.startswith("Pre")]
@@ -0,0 +1,81 @@
+// サラリーキャップページ: 検索・並び替え・さらに表示
+// アセットページから読み込まれた場合は DOMContentLoaded 後に実行されるため、その場で初期化する
+(function (init) {
+    if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", init);
+    else init();
+})(function () {
+    const searchInput = document.getElementById("capSearchInput");
+    const tableBody = document.querySelector("#capTable tbody");
+    const loadMoreBtn = document.getElementById("capLoadMoreBtn");
+    if(!tableBody) return;
+
+    const rows = Array.from(tableBody.querySelectorAll(".cap-roster-row"));
+    const headers = document.querySelectorAll("#capTable th.sortable");
+
+    let sortCol = "cap";
+    let sortDir = -1; 
+    let visibleCount = 20;
+    let currentQuery = "";
+
+    function renderTable() {
+        const query = (searchInput.value || "").toLowerCase().trim();
+
+        if (query !== currentQuery) {
+            visibleCount = 20;
+            currentQuery = query;
+        }
+
+        const visibleRows = rows.filter(row => {
+            if (!query) return true;
+            return row.dataset.search.includes(query);
+        });
+
+        visibleRows.sort((a, b) => {
+            const valA = parseFloat(a.dataset[sortCol]) || 0;
+            const valB = parseFloat(b.dataset[sortCol]) || 0;
+            return (valA - valB) * sortDir;
+        });
+
+        rows.forEach(r => r.style.display = "none");
+
+        const rowsToShow = visibleRows.slice(0, visibleCount);
+        rowsToShow.forEach(r => {
+            r.style.display = "";
+            tableBody.appendChild(r);
+        });
+
+        if (loadMoreBtn) {
+            if (visibleCount < visibleRows.length) {
+                loadMoreBtn.style.display = "inline-block";
+            } else {
+                loadMoreBtn.style.display = "none";
+            }
+        }
+    }
+
+    if(searchInput) {
+        searchInput.addEventListener("input", renderTable);
+    }
+
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener("click", () => {
+            visibleCount += 20;
+            renderTable();
+        });
+    }
+
+    headers.forEach(th => {
+        th.addEventListener("click", () => {
+            const col = th.dataset.sort;
+            if (sortCol === col) {
+                sortDir *= -1;
+            } else {
+                sortCol = col;
+                sortDir = -1;
+            }
+            renderTable();
+        });
+    });
+
+    renderTable();
+});
@@ -0,0 +1,131 @@
+// ロスターページ: カードの開閉・検索・フィルタ・並び替え
+// アセットページから読み込まれた場合は DOMContentLoaded 後に実行されるため、その場で初期化する
+// 分割公開時はポジション別フラグメントの差し込み（window.jnRosterFragments）を待ってから初期化する
+(function (init) {
+    var start = function () { Promise.resolve(window.jnRosterFragments).then(init); };
+    if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", start);
+    else start();
+})(function () {
+  const cards = document.querySelectorAll('.player-card');
+  const playerList = document.querySelector("#rosterList");
+
+  cards.forEach(card => {
+    const toggle = card.querySelector('.player-toggle');
+    if (toggle) {
+      toggle.addEventListener('click', () => {
+        card.classList.toggle('is-open');
+      });
+    }
+  });
+
+  const searchInput = document.getElementById("searchInput");
+  const filterPos = document.getElementById("filterPos");
+  const filterStatus = document.getElementById("filterStatus");
+  const filterAcq = document.getElementById("filterAcq");
+  const filterDraft = document.getElementById("filterDraft");
+  const filterJoin = document.getElementById("filterJoin");
+  const filterFa = document.getElementById("filterFa");
+  const sortBy = document.getElementById("sortBy");
+  const sortToggle = document.getElementById("sortToggle");
+  const hideOut = document.getElementById("hideOut");
+
+  const toNum = (v, fallback = 99999) => {
+    const n = parseFloat(v);
+    return Number.isNaN(n) ? fallback : n;
+  };
+
+  const posPriority = { 
+    QB:0, RB:1, WR:2, TE:3, OL:4, DL:5, EDGE:6, LB:7, CB:8, S:9, K:10, P:11, LS:12, RS:13, UNK:99 
+  };
+    
+  const statusPriority = { active: 0, ir: 1, pup: 2, nfi: 3, ps: 4, susp: 5, eip: 6, out: 99 };
+
+  const doFilterAndSort = () => {
+    const searchVal = (searchInput.value || "").toLowerCase().trim();
+    const posVal = filterPos.value;
+    const statusVal = filterStatus.value;
+    const acqVal = filterAcq.value;
+    const draftVal = (filterDraft.value || "").trim();
+    const joinVal = (filterJoin.value || "").trim();
+    const faVal = (filterFa.value || "").trim();
+    const isHideOut = hideOut.checked;
+
+    const sortKey = sortBy.value; 
+    const sortDir = sortToggle.dataset.dir === "desc" ? -1 : 1;
+
+    const items = Array.from(playerList.children);
+
+    const visibleItems = items.filter(item => {
+      const d = item.dataset;
+      if (searchVal && !d.search.includes(searchVal)) return false;
+      if (posVal && d.pos !== posVal) return false;
+      if (statusVal && d.status !== statusVal) return false;
+      if (acqVal && d.acq !== acqVal) return false;
+      if (draftVal && d.draft !== draftVal) return false;
+      if (joinVal && d.join !== joinVal) return false;
+      if (faVal && d.fa !== faVal) return false;
+      if (isHideOut && d.status === "out") return false;
+      return true;
+    });
+
+    items.forEach(item => item.style.display = "none");
+    visibleItems.forEach(item => item.style.display = "");
+
+    if (sortKey) {
+      visibleItems.sort((a, b) => {
+        const da = a.dataset;
+        const db = b.dataset;
+        if (sortKey === "number" || sortKey === "cap") {
+          return (toNum(da[sortKey], 0) - toNum(db[sortKey], 0)) * sortDir;
+        } else if (sortKey === "name") {
+          return da.name.localeCompare(db.name) * sortDir;
+        } else if (sortKey === "pos") {
+          const pA = posPriority[da.pos] ?? 99;
+          const pB = posPriority[db.pos] ?? 99;
+          if (pA !== pB) return (pA - pB) * sortDir;
+          return (toNum(da.number) - toNum(db.number));
+        }
+        return 0;
+      });
+    } else {
+      visibleItems.sort((a, b) => {
+        const pA = posPriority[a.dataset.pos] ?? 99;
+        const pB = posPriority[b.dataset.pos] ?? 99;
+        if (pA !== pB) return pA - pB;
+        const sa = statusPriority[a.dataset.status] ?? 99;
+        const sb = statusPriority[b.dataset.status] ?? 99;
+        if (sa !== sb) return sa - sb;
+        return toNum(a.dataset.number) - toNum(b.dataset.number);
+      });
+    }
+    visibleItems.forEach(item => playerList.appendChild(item));
+  };
+
+  [searchInput, filterPos, filterStatus, filterAcq, filterDraft, filterJoin, filterFa, sortBy, hideOut].forEach(el => {
+    if(el) el.addEventListener('input', doFilterAndSort);
+  });
+
+  if(sortToggle) {
+    sortToggle.addEventListener('click', () => {
+      const current = sortToggle.dataset.dir || "asc";
+      const nextDir = current === "asc" ? "desc" : "asc";
+      sortToggle.dataset.dir = nextDir;
+      sortToggle.textContent = nextDir === "asc" ? "ASC" : "DESC";
+      doFilterAndSort();
+    });
+  }
+
+  const controlPanel = document.querySelector('.control-panel');
+  if (controlPanel) {
+    const header = controlPanel.querySelector('.panel-header');
+    if (header) { 
+        header.addEventListener('click', function() {
+          if (window.innerWidth <= 600) {
+            controlPanel.classList.toggle('is-panel-open');
+          }
+        });
+    }
+  }
+    
+  doFilterAndSort();
+});
@@ -0,0 +1,56 @@
+// スケジュールページ: タブ切り替え
+// アセットページから読み込まれた場合は DOMContentLoaded 後に実行されるため、その場で初期化する
+(function (init) {
+    if (document.readyState === "loading") document.addEventListener("DOMContentLoaded", init);
+    else init();
+})(function () {
+    const now = new Date();
+    const month = now.getMonth() + 1;
+    let defaultTab = "reg";
+
+    const hasPost = document.getElementById("post") !== null;
+    const hasPre = document.getElementById("pre") !== null;
+
+    if (month >= 5 && month <= 8 && hasPre) {
+        defaultTab = "pre";
+    } else if ((month === 1 || month === 2) && hasPost) {
+        defaultTab = "post";
+    } else if (!document.getElementById(defaultTab)) {
+        if (hasPost) defaultTab = "post";
+        else if (hasPre) defaultTab = "pre";
+    }
+
+    document.querySelectorAll(".tab-content").forEach(tab => {
+        tab.classList.remove("active");
+        tab.style.display = "none";
+    });
+    document.querySelectorAll(".tab-btn").forEach(btn => {
+        btn.classList.remove("active");
+        if (btn.dataset.target === defaultTab) {
+            btn.classList.add("active");
+        }
+    });
+
+    const defaultContent = document.getElementById(defaultTab);
+    if (defaultContent) {
+        defaultContent.style.display = "block";
+        defaultContent.classList.add("active");
+    }
+
+    document.querySelectorAll(".tab-btn").forEach(button => {
+        button.addEventListener("click", () => {
+            const target = button.dataset.target;
+            document.querySelectorAll(".tab-btn").forEach(btn => btn.classList.remove("active"));
+            button.classList.add("active");
+            document.querySelectorAll(".tab-content").forEach(tab => {
+                if (tab.id === target) {
+                    tab.style.display = "block";
+                    tab.classList.add("active");
+                } else {
+                    tab.classList.remove("active");
+                    tab.style.display = "none";
+                }
+            });
+        });
+    });
+});
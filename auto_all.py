@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import auto_schedule
+import auto_news
+import auto_roster_cap
+import hatena_publisher
+import hatena_assets
+
+# ==============================================================================
+# 全ページ一括更新
+#   スケジュール・ニュース・ロスターの3つのNotion DBを並列に取得し、
+#   取得できたデータセットから順に生成して、はてなブログへのアップロードを並列に進める。
+#   Notion へのリクエスト間隔は notion_api 側のレートリミッタでプロセス全体として制御される。
+# ==============================================================================
+MAX_WORKERS = int(os.environ.get("NOTION_MAX_WORKERS") or 4)
+
+
+def fetch_schedule():
+    return auto_schedule.fetch_from_notion()
+
+def fetch_archive_news():
+    return auto_news.fetch_news_from_notion(season_filter=auto_news.TARGET_SEASON, page_size=100)
+
+def fetch_latest_news():
+    return auto_news.fetch_news_from_notion(season_filter=None, page_size=10)
+
+
+def schedule_entries(df):
+    if df.empty:
+        print("[WARN] Schedule: データが見つかりませんでした。Seasonプロパティを確認してください。", file=sys.stderr)
+        return []
+    return auto_schedule.schedule_entries(df)
+
+def archive_news_entries(news):
+    return [auto_news.archive_news_entry(news)]
+
+def latest_news_entries(news):
+    return [auto_news.latest_news_entry(news)]
+
+
+# (ジョブ名, 取得関数, 更新ページ生成関数)
+JOBS = [
+    ("schedule", fetch_schedule, schedule_entries),
+    ("news-archive", fetch_archive_news, archive_news_entries),
+    ("news-latest", fetch_latest_news, latest_news_entries),
+    ("roster+cap", auto_roster_cap.fetch_roster_cap_data, auto_roster_cap.roster_cap_entries),
+]
+
+
+def main():
+    started = time.perf_counter()
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool, \
+         ThreadPoolExecutor(max_workers=hatena_publisher.MAX_WORKERS) as upload_pool:
+        futures = {pool.submit(fetch): (name, build) for name, fetch, build in JOBS}
+        # Entry.after の順序（ロスターのフラグメント → メインページ）はキューが守る
+        uploads = hatena_publisher.UploadQueue(upload_pool)
+
+        # 共有アセットは参照するページより先に公開しておく（取得は裏で進む）
+        if not hatena_assets.publish_assets():
+            failed.append("assets")
+
+        # 取得が終わったものから順に生成し、アップロードを投入（残りの取得・アップロードは裏で進む）
+        for future in as_completed(futures):
+            name, build = futures[future]
+            elapsed = time.perf_counter() - started
+            try:
+                data = future.result()
+                print(f"[{name}] fetched at {elapsed:.1f}s", file=sys.stderr)
+                for entry in build(data):
+                    uploads.submit(entry)
+            except Exception as e:
+                print(f"[ERROR] {name}: {e}", file=sys.stderr)
+                failed.append(name)
+
+        failed += uploads.wait()
+
+    print(f"Done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if failed:
+        print(f"[ERROR] failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import os
 import sys
+import numpy as np
 import json
-import requests
 import html
+from collections import namedtuple
 from datetime import datetime
-from requests.auth import HTTPBasicAuth
+from notion_api import iter_pages, extract_columns, property_condition, any_of
+from hatena_publisher import Entry, update_entry
+from hatena_assets import asset_html, asset_loader, publish_assets
+from html_template import Template
 
 # ==============================================================================
 # 0. ⚙️ シーズン設定（毎年・時期によって変更する部分）
@@ -13,48 +17,20 @@ CONFIG = {
     "CURRENT_YEAR": 2025,
     "LEAGUE_CAP_LIMIT_MILLION": 279.2,  # リーグ基本キャップ
     "CARRYOVER_MILLION": 15.890203,     # 前年からの繰越金
-    "IS_TOP51_MODE": False               # True: オフシーズン(Top51), False: シーズン中(全選手)
+    "IS_TOP51_MODE": False,              # True: オフシーズン(Top51), False: シーズン中(全選手)
+    "MIN_SALARY_MILLION": 1.255,        # リストラクチャー後も基本給として残す額（ベテラン最低年俸）
 }
 
 # ==============================================================================
 # 1. 設定・定数
 # ==============================================================================
-NOTION_API_KEY = os.environ.get('NOTION_TOKEN') 
 CAP_DB_ID = os.environ.get('NOTION_ROSTER_DB_ID') 
 
-HATENA_ID = os.environ.get('HATENA_USER')
-HATENA_BLOG_ID = os.environ.get('HATENA_BLOG')
-HATENA_API_KEY = os.environ.get('HATENA_API_KEY')
-
 TARGET_ENTRY_ID = os.environ.get('HATENA_LATEST_CAP_PAGE_ID') or "" 
 
 # ==============================================================================
 # 2. 補助関数
 # ==============================================================================
-def get_property_value(page, prop_name):
-    props = page.get("properties", {})
-    if prop_name not in props: return ""
-    
-    prop = props[prop_name]
-    prop_type = prop.get("type")
-
-    try:
-        if prop_type == "title":
-            return prop["title"][0]["plain_text"] if prop["title"] else ""
-        elif prop_type == "rich_text":
-            return "".join([t["plain_text"] for t in prop["rich_text"]]) if prop["rich_text"] else ""
-        elif prop_type == "number":
-            return prop["number"] if prop["number"] is not None else ""
-        elif prop_type == "select":
-            return prop["select"]["name"] if prop["select"] else ""
-        elif prop_type == "status": 
-            return prop["status"]["name"] if prop["status"] else ""
-        elif prop_type == "multi_select":
-            return ",".join([s["name"] for s in prop["multi_select"]]) if prop["multi_select"] else ""
-    except:
-        return ""
-    return ""
-
 def determine_unit(positions_str):
     if not positions_str: return "Unknown"
     primary_pos = [p.strip().upper() for p in positions_str.split(",") if p.strip()][0]
@@ -80,109 +56,237 @@ def format_money(amount):
 
 # ==============================================================================
 # 3. データ取得とパース
+#   年ごとの金額（Cap Salary / Actual Dead / Potential Dead）は選手 × 年の整数行列で持つ。
+#   列 j が CURRENT_YEAR + j 年で、契約のない年は 0。集計やタイムラインは行列の演算で出す。
 # ==============================================================================
-def fetch_cap_data():
-    url = f"https://api.notion.com/v1/databases/{CAP_DB_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_API_KEY}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
-    results = []
-    has_more = True
-    next_cursor = None
+# Notionから取得するプロパティ（parse_cap_players が参照するもののみ。decode_cap_row の引数順）
+NOTION_PROPERTIES = [
+    "Name", "Position", "Status", "Leave", "FA", "Cap Salary", "Actual Dead", "Potential Dead",
+]
+
+# タイムラインに出す年数（行列の列数は最低でもこれだけ確保する）
+TIMELINE_YEARS = 5
 
+# id / name / position / unit / fa_year は選手ごとの配列、
+# cap / actual_dead / potential_dead は (選手 × 年) の int64 行列
+CapPlayers = namedtuple(
+    "CapPlayers",
+    ["id", "name", "position", "unit", "fa_year", "cap", "actual_dead", "potential_dead"],
+)
+
+def select_properties(names):
+    """DBのプロパティ名から取得対象を選ぶ"""
+    return [n for n in names if n in NOTION_PROPERTIES]
+
+def notion_filter():
+    """
+    過去の退団者を除外するNotion側フィルタ。parse_cap_players と同じ条件
+    （Status が Left 以外、または Leave が前年以降）で、Python側の判定も安全策として残す。
+    """
+    return any_of(
+        property_condition(CAP_DB_ID, "Status", "does_not_equal", "Left"),
+        property_condition(CAP_DB_ID, "Status", "is_empty"),
+        property_condition(CAP_DB_ID, "Leave", "greater_than_or_equal_to", CONFIG["CURRENT_YEAR"] - 1),
+    )
+
+def fetch_cap_data():
     print("Fetching data from Notion...", file=sys.stderr)
+    query_filter = notion_filter()
+    payload = {"filter": query_filter} if query_filter else None
+    return parse_cap_players(iter_pages(CAP_DB_ID, payload, properties=select_properties))
 
-    while has_more:
-        payload = {}
-        if next_cursor: payload["start_cursor"] = next_cursor
-            
-        resp = requests.post(url, headers=headers, json=payload)
-        if resp.status_code != 200:
-            print(f"[ERROR] Notion API Failed: {resp.text}", file=sys.stderr)
-            break
-            
-        data = resp.json()
-        results.extend(data.get("results", []))
-        has_more = data.get("has_more", False)
-        next_cursor = data.get("next_cursor")
-
-    players = []
-    for page in results:
-        name = get_property_value(page, "Name")
-        if not name: continue
-        
-        pos_str = get_property_value(page, "Position")
-        status = get_property_value(page, "Status")
-        leave_year = get_property_value(page, "Leave")
-        
-        unit = determine_unit(pos_str)
-        
-        if status == "Left":
-            if leave_year == "" or float(leave_year) < (CONFIG["CURRENT_YEAR"] - 1):
-                continue
-            unit = "Dead"
-            
-        fa_val = get_property_value(page, "FA")
-        fa_year = int(float(fa_val)) if str(fa_val).replace('.','').isdigit() else 2099
-        
-        cap_str = get_property_value(page, "Cap Salary") or "0"
-        act_dead_str = get_property_value(page, "Actual Dead") or "0"
-        pot_dead_str = get_property_value(page, "Potential Dead") or "0"
-        
-        caps = [int(float(s.strip())) if s.strip().replace('.','',1).isdigit() else 0 for s in cap_str.split(",")]
-        act_deads = [int(float(s.strip())) if s.strip().replace('.','',1).isdigit() else 0 for s in act_dead_str.split(",")]
-        pot_deads = [int(float(s.strip())) if s.strip().replace('.','',1).isdigit() else 0 for s in pot_dead_str.split(",")]
-        
-        max_len = max(len(caps), len(act_deads), len(pot_deads))
-        caps += [0] * (max_len - len(caps))
-        act_deads += [0] * (max_len - len(act_deads))
-        pot_deads += [0] * (max_len - len(pot_deads))
-        
-        current_cap = caps[0]
-        current_act_dead = act_deads[0]
-        pot_dead = pot_deads[0]
-        savings = 0 if unit == "Dead" else current_cap - pot_dead
-        
-        timeline_data = { (CONFIG["CURRENT_YEAR"] + i): {"cap": caps[i], "act": act_deads[i], "pot": pot_deads[i]} for i in range(max_len) }
-        
-        auto_pot_year = None
-        for i in range(len(caps)):
-            y = CONFIG["CURRENT_YEAR"] + i
-            c = caps[i]
-            d = pot_deads[i] if i < len(pot_deads) else 0
-            savings_i = c - d
-            if y >= fa_year or unit == "Dead": break
-            
-            if savings_i > 0 and c > 0 and savings_i >= d:
-                auto_pot_year = y
-                break
-
-        primary_pos = [p.strip() for p in pos_str.split(",")][0] if pos_str else "UNK"
-
-        players.append({
-            "id": page["id"],
-            "name": name,
-            "position": primary_pos,
-            "unit": unit,
-            "faYear": fa_year,
-            "currentCap": current_cap,
-            "currentActualDead": current_act_dead,
-            "potentialDead": pot_dead,
-            "savings": savings,
-            "timelineData": timeline_data,
-            "contractLength": max_len,
-            "potentialOutYear": auto_pot_year
-        })
+def parse_cap_players(results):
+    # results はジェネレータでもよい（列ごとのリストへ直接展開し、生のページJSONは保持しない）
+    return players_from_columns(extract_columns(results, NOTION_PROPERTIES, with_ids=True))
+
+def players_from_columns(columns):
+    rows = zip(columns["id"], *(columns[name] for name in NOTION_PROPERTIES))
+    decoded = [p for p in (decode_cap_row(*row) for row in rows) if p is not None]
+    print(f"Fetched {len(decoded)} active/dead records.", file=sys.stderr)
+
+    ids, names, positions, units, fa_years, cap_strs, act_dead_strs, pot_dead_strs = (
+        zip(*decoded) if decoded else ((),) * 8
+    )
+    matrices = [parse_amounts(strs) for strs in (cap_strs, act_dead_strs, pot_dead_strs)]
+    width = max([TIMELINE_YEARS] + [m.shape[1] for m in matrices])
+    cap, actual_dead, potential_dead = [np.pad(m, ((0, 0), (0, width - m.shape[1]))) for m in matrices]
+    return CapPlayers(
+        np.array(ids, dtype=object), np.array(names, dtype=object),
+        np.array(positions, dtype=object), np.array(units, dtype=object),
+        np.array(fa_years, dtype=np.int64), cap, actual_dead, potential_dead,
+    )
+
+def decode_cap_row(page_id, name, pos_str, status, leave_year, fa_val, cap_str, act_dead_str, pot_dead_str):
+    """1選手分の列データを (id, 名前, ポジション, ユニット, FA年, 金額の文字列 x3) に変換（表示対象外の退団者・名前なしは None）"""
+    if not name: return None
+    
+    unit = determine_unit(pos_str)
+    
+    if status == "Left":
+        if leave_year == "" or float(leave_year) < (CONFIG["CURRENT_YEAR"] - 1):
+            return None
+        unit = "Dead"
         
-    print(f"Fetched {len(players)} active/dead records.", file=sys.stderr)
-    return players
+    fa_year = int(float(fa_val)) if str(fa_val).replace('.','').isdigit() else 2099
+    primary_pos = [p.strip() for p in pos_str.split(",")][0] if pos_str else "UNK"
+
+    return page_id, name, primary_pos, unit, fa_year, cap_str or "0", act_dead_str or "0", pot_dead_str or "0"
+
+def parse_amounts(strings):
+    """カンマ区切りの年ごとの金額を (選手 × 年) の int64 行列にする（数値でない値・足りない年は 0）"""
+    tokens = [s.split(",") for s in strings]
+    lengths = np.array([len(t) for t in tokens], dtype=np.int64)
+    values = [int(float(s)) if s.replace('.','',1).isdigit() else 0 for s in (s.strip() for t in tokens for s in t)]
+    matrix = np.zeros((len(tokens), int(lengths.max()) if len(tokens) else 0), dtype=np.int64)
+    # 行優先で埋まるので、各行の先頭 length 列に順に入る
+    matrix[np.arange(matrix.shape[1]) < lengths[:, None]] = values
+    return matrix
+
+def cap_savings(players):
+    """今季カットした場合の節約額（Cap Salary - Potential Dead）。退団者は 0"""
+    savings = players.cap[:, 0] - players.potential_dead[:, 0]
+    return np.where(players.unit == "Dead", 0, savings)
+
+def potential_out_index(players):
+    """
+    カット候補の年（列番号）。FA年より前で、節約額が正かつ Potential Dead 以上になる最初の年。
+    該当しない選手・退団者は -1
+    """
+    cap, pot = players.cap, players.potential_dead
+    savings = cap - pot
+    years = CONFIG["CURRENT_YEAR"] + np.arange(cap.shape[1])
+    candidate = (
+        (years < players.fa_year[:, None]) & (players.unit != "Dead")[:, None]
+        & (savings > 0) & (cap > 0) & (savings >= pot)
+    )
+    return np.where(candidate.any(axis=1), candidate.argmax(axis=1), -1)
+
+# ==============================================================================
+# 4. カット・リストラクチャーの試算
+#   全選手 × 全契約年について、その年に次の操作をした場合の節約額とデッドマネーを行列でまとめて出す。
+#     Cut        : 6/1前のリリース。Potential Dead が全額その年に計上される
+#     Post 6/1   : 6/1以降のリリース。その年の按分ボーナスだけ計上し、残りは翌年に回す
+#     Restructure: 基本給（最低年俸を除く）をボーナスに変え、契約の残り年数（最大5年）で按分する
+#   按分ボーナスの内訳は Notion にないので、その年の按分額は「今年と翌年の Potential Dead の差」、
+#   基本給は「Cap Salary - その年の按分額」とみなした概算。
+# ==============================================================================
+MAX_PRORATION_YEARS = 5
+
+# 各項目は (選手 × 年) の int64 行列。契約外の年（under_contract が False）は 0
+#   june1_dead / june1_dead_next: Post 6/1 でその年・翌年に計上されるデッドマネー
+#   restructure_savings: その年の節約額（同じ額が翌年以降のキャップに上乗せされる）
+CapScenarios = namedtuple(
+    "CapScenarios",
+    ["under_contract", "cut_savings", "cut_dead", "june1_savings", "june1_dead", "june1_dead_next", "restructure_savings"],
+)
+
+def cap_scenarios(players, config):
+    cap, pot = players.cap, players.potential_dead
+    years = config["CURRENT_YEAR"] + np.arange(cap.shape[1])
+    # FA年より前でキャップが計上されている年（退団者は対象外）
+    under_contract = (cap > 0) & (years < players.fa_year[:, None]) & (players.unit != "Dead")[:, None]
+
+    next_pot = np.pad(pot[:, 1:], ((0, 0), (0, 1)))
+    prorated = np.clip(pot - next_pot, 0, cap)
+
+    min_salary = int(config.get("MIN_SALARY_MILLION", 0.0) * 1000000)
+    convertible = np.maximum(cap - prorated - min_salary, 0)
+    # その年から後ろに残っている契約年数（ボイドイヤーを含む）
+    remaining = (cap > 0)[:, ::-1].cumsum(axis=1)[:, ::-1]
+    spread = np.clip(remaining, 1, MAX_PRORATION_YEARS)
+    restructure_savings = convertible - convertible // spread
+
+    matrices = [cap - pot, pot, cap - prorated, prorated, pot - prorated, restructure_savings]
+    return CapScenarios(under_contract, *(np.where(under_contract, m, 0) for m in matrices))
 
 # ==============================================================================
-# 4. HTMLの生成
+# 5. HTMLの生成
 # ==============================================================================
+RANKING_ITEM = Template("""
+            <li class="cap-ranking-item">
+                <span class="rank-num">{rank}</span>
+                <span class="rank-name">{name}</span>
+                <span class="rank-val {val_class}">{value}</span>
+            </li>
+            """)
+
+POS_BAR_ROW = Template("""
+        <div class="pos-bar-row">
+            <div class="pos-bar-label">{pos}</div>
+            <div class="pos-bar-track">
+                <div class="pos-bar-fill {bar_color_class}" style="width: {scaled_width}%;"></div>
+            </div>
+            <div class="pos-bar-value">{cap} <span class="pos-bar-pct">({pct:.1f}%)</span></div>
+        </div>
+        """)
+
+CAP_ROSTER_ROW = Template("""
+            <tr class="cap-roster-row {row_cls}" data-search="{search}" data-cap="{cap}" data-dead="{dead}" data-save="{save}" {display_style}>
+                <td class="td-rk">{rank}</td>
+                <td class="td-name">{name} {out_badge}</td>
+                <td class="td-pos"><span class="pos-tag">{position}</span></td>
+                <td class="td-val {strike_cls}">{cap_money}</td>
+                <td class="td-val text-muted">{dead_money}</td>
+                <td class="td-val {save_cls}">{save_money}</td>
+            </tr>
+        """)
+
+# 今季の試算（1選手1行。年ごとの行にするとページが倍近くになるので、翌年以降は cap_scenarios の行列にだけ持つ）
+WHATIF_ROW = Template(
+    '<tr><td class="td-name">{name}</td><td class="td-pos">{position}</td>'
+    '<td class="td-val {cut_cls}">{cut_save}</td><td class="td-val">{cut_dead}</td>'
+    '<td class="td-val {june1_cls}">{june1_save}</td><td class="td-val">{june1_dead}</td>'
+    '<td class="td-val {restructure_cls}">{restructure_save}</td></tr>'
+)
+
+def build_whatif_html(players, active, config):
+    """今季契約中の現役選手（active の順）のカット・リストラクチャー試算の表"""
+    scenarios = cap_scenarios(players, config)
+    player_rows = active[scenarios.under_contract[active, 0]]
+    if not len(player_rows):
+        return ""
+
+    def cells(matrix):
+        return matrix[player_rows, 0].tolist()
+
+    def save_cls(values):
+        return ["text-save" if v > 0 else "text-danger" for v in values]
+
+    cut_save, june1_save, restructure_save = (
+        cells(m) for m in (scenarios.cut_savings, scenarios.june1_savings, scenarios.restructure_savings)
+    )
+    columns = {
+        "name": [html.escape(name) for name in players.name[player_rows].tolist()],
+        "position": players.position[player_rows].tolist(),
+        "cut_cls": save_cls(cut_save),
+        "cut_save": [format_money(v) for v in cut_save],
+        "cut_dead": [format_money(v) for v in cells(scenarios.cut_dead)],
+        "june1_cls": save_cls(june1_save),
+        "june1_save": [format_money(v) for v in june1_save],
+        "june1_dead": [
+            f"{format_money(now)} + {format_money(nxt)}"
+            for now, nxt in zip(cells(scenarios.june1_dead), cells(scenarios.june1_dead_next))
+        ],
+        "restructure_cls": ["text-save" if v > 0 else "text-muted" for v in restructure_save],
+        "restructure_save": [format_money(v) for v in restructure_save],
+    }
+
+    lines = ['<div class="cap-table-section cap-whatif-section">']
+    lines.append('<details class="cap-whatif">')
+    lines.append(f'<summary><h4>Release / Restructure What-If {config["CURRENT_YEAR"]} ({len(player_rows)})</h4></summary>')
+    lines.append('<p class="cap-note">※Cut: 6/1前のリリース / Post 6/1: 当年分の按分ボーナスのみ当年、残りは翌年に計上 / '
+                 f'Restructure: 最低年俸を除く基本給を残り契約年数（最大{MAX_PRORATION_YEARS}年）で按分した場合の当年の節約額。'
+                 'いずれも Potential Dead からの概算</p>')
+    lines.append('<div class="cap-table-scroll">')
+    lines.append('<table class="cap-roster-table cap-whatif-table">')
+    lines.append('<thead><tr><th>Name</th><th>Pos</th><th>Cut Save</th><th>Cut Dead</th>'
+                 '<th>Post 6/1 Save</th><th>Post 6/1 Dead (+Next)</th><th>Restructure Save</th></tr></thead>')
+    lines.append('<tbody>' + WHATIF_ROW.join_columns(columns) + '</tbody>')
+    lines.append('</table></div>')
+    lines.append('</details>')
+    lines.append('</div>')
+    return "\n".join(lines)
+
 def generate_html_content(players, config):
     curr_year = config["CURRENT_YEAR"]
     
@@ -192,38 +296,42 @@ def generate_html_content(players, config):
     
     is_top51 = config["IS_TOP51_MODE"]
     
-    active_players = [p for p in players if p["unit"] != "Dead"]
-    active_players.sort(key=lambda x: x["currentCap"], reverse=True)
+    curr_cap = players.cap[:, 0]
+    curr_act_dead = players.actual_dead[:, 0]
+    curr_pot_dead = players.potential_dead[:, 0]
+    savings = cap_savings(players)
+    is_dead = players.unit == "Dead"
     
-    top51_ids = [p["id"] for p in active_players[:51]]
+    # 現役選手の行番号（今季のキャップが大きい順。同額は元の順）
+    active = np.flatnonzero(~is_dead)
+    active = active[np.argsort(-curr_cap[active], kind="stable")]
     
-    total_cap = 0
-    total_act_dead = 0
-    countable_players = []
+    # Top51 モードでは上位51名だけをキャップに数える
+    counted = np.arange(len(active)) < 51 if is_top51 else np.ones(len(active), dtype=bool)
+    countable = np.zeros(len(is_dead), dtype=bool)
+    countable[active[counted]] = True
     
-    for p in players:
-        total_act_dead += p["currentActualDead"]
-        if p["unit"] != "Dead":
-            if not is_top51 or p["id"] in top51_ids:
-                total_cap += p["currentCap"]
-                countable_players.append(p)
+    total_cap = int(curr_cap[countable].sum())
+    total_act_dead = int(curr_act_dead.sum())
                 
     team_total = total_cap + total_act_dead
     cap_space = adjusted_cap_limit - team_total
     
-    off_cap = sum(p["currentCap"] for p in countable_players if p["unit"] == "Offense")
-    def_cap = sum(p["currentCap"] for p in countable_players if p["unit"] == "Defense")
-    st_cap = sum(p["currentCap"] for p in countable_players if p["unit"] == "Special Teams")
+    off_cap, def_cap, st_cap = (
+        int(curr_cap[countable & (players.unit == unit)].sum()) for unit in ("Offense", "Defense", "Special Teams")
+    )
     
     off_pct = (off_cap / team_total * 100) if team_total > 0 else 0
     def_pct = (def_cap / team_total * 100) if team_total > 0 else 0
     st_pct = (st_cap / team_total * 100) if team_total > 0 else 0
     dead_pct = (total_act_dead / team_total * 100) if team_total > 0 else 0
     
-    pos_dict = {}
-    for p in countable_players:
-        pos_name = "ST" if p["unit"] == "Special Teams" else p["position"]
-        pos_dict[pos_name] = pos_dict.get(pos_name, 0) + p["currentCap"]
+    # ポジション別の合計（キーは元の順で最初に出てきた順）
+    pos_names = np.where(players.unit == "Special Teams", "ST", players.position)[countable]
+    pos_keys, first_seen, pos_index = np.unique(pos_names, return_index=True, return_inverse=True)
+    pos_caps = np.zeros(len(pos_keys), dtype=np.int64)
+    np.add.at(pos_caps, pos_index, curr_cap[countable])
+    pos_dict = {pos_keys[i]: int(pos_caps[i]) for i in np.argsort(first_seen)}
         
     fixed_pos_order = ["QB", "RB", "WR", "TE", "OL", "DL", "EDGE", "LB", "CB", "S", "ST"]
     pos_stats = []
@@ -234,10 +342,14 @@ def generate_html_content(players, config):
     for pos, cap in sorted(pos_dict.items(), key=lambda x: x[1], reverse=True):
         pos_stats.append({"pos": pos, "cap": cap, "pct": (cap / total_cap * 100) if total_cap > 0 else 0})
 
-    top_caps = sorted(active_players, key=lambda x: x["currentCap"], reverse=True)[:5]
-    top_pots = sorted(active_players, key=lambda x: x["potentialDead"], reverse=True)[:5]
-    top_saves = sorted(active_players, key=lambda x: x["savings"], reverse=True)[:5]
-    top_deads = sorted([p for p in players if p["unit"] == "Dead"], key=lambda x: x["currentActualDead"], reverse=True)[:5]
+    def top5(rows, values):
+        """rows を values の大きい順に並べた上位5件（同額は rows の順）"""
+        return rows[np.argsort(-values[rows], kind="stable")][:5]
+
+    top_caps = active[:5]
+    top_pots = top5(active, curr_pot_dead)
+    top_saves = top5(active, savings)
+    top_deads = top5(np.flatnonzero(is_dead), curr_act_dead)
 
     html_lines = []
     html_lines.append('<div class="cap-dashboard-wrapper">')
@@ -287,27 +399,22 @@ def generate_html_content(players, config):
     </div>
     """)
     
-    def build_ranking_html(title, items, val_key, val_class):
+    def build_ranking_html(title, rows, values, val_class):
         lines = [f'<div class="cap-ranking-box"><h4>{title}</h4><ul class="cap-ranking-list">']
-        if not items:
+        if not len(rows):
             lines.append('<li class="cap-ranking-empty">データなし</li>')
-        for i, item in enumerate(items):
-            val = item[val_key]
-            lines.append(f"""
-            <li class="cap-ranking-item">
-                <span class="rank-num">{i+1}</span>
-                <span class="rank-name">{html.escape(item['name'])}</span>
-                <span class="rank-val {val_class}">{format_money(val)}</span>
-            </li>
-            """)
+        lines.append(RANKING_ITEM.join([
+            {"rank": i + 1, "name": html.escape(name), "val_class": val_class, "value": format_money(value)}
+            for i, (name, value) in enumerate(zip(players.name[rows], values[rows].tolist()))
+        ]))
         lines.append('</ul></div>')
         return "".join(lines)
 
     html_lines.append('<div class="cap-ranking-grid">')
-    html_lines.append(build_ranking_html("Cap Hit TOP5", top_caps, "currentCap", "val-cap"))
-    html_lines.append(build_ranking_html("Untouchable (Dead) TOP5", top_pots, "potentialDead", "val-dead"))
-    html_lines.append(build_ranking_html("Cut Candidates (Save) TOP5", top_saves, "savings", "val-save"))
-    html_lines.append(build_ranking_html("Actual Dead TOP5", top_deads, "currentActualDead", "val-actual-dead"))
+    html_lines.append(build_ranking_html("Cap Hit TOP5", top_caps, curr_cap, "val-cap"))
+    html_lines.append(build_ranking_html("Untouchable (Dead) TOP5", top_pots, curr_pot_dead, "val-dead"))
+    html_lines.append(build_ranking_html("Cut Candidates (Save) TOP5", top_saves, savings, "val-save"))
+    html_lines.append(build_ranking_html("Actual Dead TOP5", top_deads, curr_act_dead, "val-actual-dead"))
     html_lines.append('</div>')
     
     html_lines.append('<div class="cap-charts-grid">')
@@ -329,27 +436,21 @@ def generate_html_content(players, config):
     </div>
     """)
     
-    pos_html = '<div class="pos-bars-container">'
     # ★修正: 最もお金をかけているポジションの割合を取得
     max_pos_pct = max([st["pct"] for st in pos_stats]) if pos_stats else 100
     
+    pos_rows = []
     for st in pos_stats:
-        # オフェンス/ディフェンス/STでバーの色を変える
-        bar_color_class = "bar-st" if st["pos"] == "ST" else "bar-off" if st["pos"] in ["QB", "RB", "WR", "TE", "OL"] else "bar-def"
-        
-        # ★修正: 最大のポジションを基準(85%)にして幅をスケーリングする
-        scaled_width = (st["pct"] / max_pos_pct) * 85 if max_pos_pct > 0 else 0
-        
-        pos_html += f"""
-        <div class="pos-bar-row">
-            <div class="pos-bar-label">{st["pos"]}</div>
-            <div class="pos-bar-track">
-                <div class="pos-bar-fill {bar_color_class}" style="width: {scaled_width}%;"></div>
-            </div>
-            <div class="pos-bar-value">{format_money(st["cap"])} <span class="pos-bar-pct">({st["pct"]:.1f}%)</span></div>
-        </div>
-        """
-    pos_html += '</div>'
+        pos_rows.append({
+            "pos": st["pos"],
+            # オフェンス/ディフェンス/STでバーの色を変える
+            "bar_color_class": "bar-st" if st["pos"] == "ST" else "bar-off" if st["pos"] in ["QB", "RB", "WR", "TE", "OL"] else "bar-def",
+            # ★修正: 最大のポジションを基準(85%)にして幅をスケーリングする
+            "scaled_width": (st["pct"] / max_pos_pct) * 85 if max_pos_pct > 0 else 0,
+            "cap": format_money(st["cap"]),
+            "pct": st["pct"],
+        })
+    pos_html = '<div class="pos-bars-container">' + POS_BAR_ROW.join(pos_rows) + '</div>'
         
     html_lines.append(f"""
     <div class="cap-chart-box">
@@ -359,10 +460,25 @@ def generate_html_content(players, config):
     """)
     html_lines.append('</div>')
     
-    timeline_players = sorted(active_players, key=lambda x: x["currentCap"], reverse=True)[:15]
-    if timeline_players:
+    timeline_rows = active[:15]
+    if len(timeline_rows):
         # ★修正: タイムラインを「直近5年間」に完全固定
-        t_years = [curr_year + i for i in range(5)]
+        t_years = [curr_year + i for i in range(TIMELINE_YEARS)]
+        
+        # (選手 × 年) のセルの状態をまとめて計算する
+        unit = players.unit[timeline_rows]
+        not_dead = (unit != "Dead")[:, None]
+        year_grid = np.array(t_years)
+        fa_year = players.fa_year[timeline_rows][:, None]
+        is_fa_year_or_later = not_dead & (year_grid >= fa_year)
+        is_fa_exact = not_dead & (year_grid == fa_year)
+        is_pot_cut = np.arange(TIMELINE_YEARS) == potential_out_index(players)[timeline_rows][:, None]
+        
+        amount = players.cap[timeline_rows, :TIMELINE_YEARS] + players.actual_dead[timeline_rows, :TIMELINE_YEARS]
+        pot = players.potential_dead[timeline_rows, :TIMELINE_YEARS]
+        is_void_burst = is_fa_year_or_later & (amount == 0) & (pot > 0)
+        amount = np.where(is_void_burst, pot, amount)
+        is_void = is_fa_year_or_later & (amount > 0)
         
         html_lines.append('<div class="cap-timeline-section">')
         html_lines.append('<h4>Core Players Timeline</h4>')
@@ -373,39 +489,25 @@ def generate_html_content(players, config):
         for y in t_years: html_lines.append(f'<div class="tl-year">{y}</div>')
         html_lines.append('</div></div>')
         
-        for tp in timeline_players:
-            dot_class = "dot-off" if tp["unit"] == "Offense" else "dot-def" if tp["unit"] == "Defense" else "dot-st"
-            html_lines.append(f'<div class="tl-row"><div class="tl-name-col"><span class="dot {dot_class}"></span>{html.escape(tp["name"])}</div><div class="tl-years-col">')
+        cells = zip(amount.tolist(), is_void.tolist(), is_pot_cut.tolist(), is_fa_exact.tolist())
+        for name, tp_unit, (amounts, voids, pot_cuts, fa_exacts) in zip(players.name[timeline_rows], unit, cells):
+            dot_class = "dot-off" if tp_unit == "Offense" else "dot-def" if tp_unit == "Defense" else "dot-st"
+            html_lines.append(f'<div class="tl-row"><div class="tl-name-col"><span class="dot {dot_class}"></span>{html.escape(name)}</div><div class="tl-years-col">')
             
-            for y in t_years:
-                is_fa_year_or_later = (tp["unit"] != "Dead" and y >= tp["faYear"])
-                is_fa_exact = (tp["unit"] != "Dead" and y == tp["faYear"])
-                is_pot_cut = (y == tp["potentialOutYear"])
-                
-                c_data = tp["timelineData"].get(y, {"cap": 0, "act": 0, "pot": 0})
-                
-                amount = c_data["cap"] + c_data["act"]
-                
-                is_void_burst = False
-                if is_fa_year_or_later and amount == 0 and c_data["pot"] > 0:
-                    amount = c_data["pot"]
-                    is_void_burst = True
-                
-                is_void = is_fa_year_or_later and amount > 0
-                
+            for cell_amount, cell_void, cell_pot_cut, cell_fa_exact in zip(amounts, voids, pot_cuts, fa_exacts):
                 cell_classes = ["tl-cell"]
-                if amount > 0:
-                    bg = "bg-dead" if tp["unit"] == "Dead" else "bg-void" if is_void else "bg-off" if tp["unit"] == "Offense" else "bg-def" if tp["unit"] == "Defense" else "bg-st"
+                if cell_amount > 0:
+                    bg = "bg-dead" if tp_unit == "Dead" else "bg-void" if cell_void else "bg-off" if tp_unit == "Offense" else "bg-def" if tp_unit == "Defense" else "bg-st"
                     cell_classes.append(bg)
                     
                 html_lines.append(f'<div class="{" ".join(cell_classes)}">')
-                if amount > 0:
-                    txt_cls = "txt-void" if (is_void and tp["unit"] != "Dead") else "txt-val"
-                    html_lines.append(f'<span class="{txt_cls}">{format_money(amount)}</span>')
-                    if is_void and tp["unit"] != "Dead": html_lines.append('<span class="badge-void">VOID</span>')
+                if cell_amount > 0:
+                    txt_cls = "txt-void" if (cell_void and tp_unit != "Dead") else "txt-val"
+                    html_lines.append(f'<span class="{txt_cls}">{format_money(cell_amount)}</span>')
+                    if cell_void and tp_unit != "Dead": html_lines.append('<span class="badge-void">VOID</span>')
                 
-                if is_pot_cut: html_lines.append('<span class="badge-pot">✂️</span>')
-                if is_fa_exact and amount == 0: html_lines.append('<span class="badge-fa">FA</span>')
+                if cell_pot_cut: html_lines.append('<span class="badge-pot">✂️</span>')
+                if cell_fa_exact and cell_amount == 0: html_lines.append('<span class="badge-fa">FA</span>')
                 html_lines.append('</div>')
                 
             html_lines.append('</div></div>')
@@ -434,177 +536,63 @@ def generate_html_content(players, config):
         <tbody>
     """)
     
-    for i, p in enumerate(active_players):
-        is_counted = not is_top51 or (p["id"] in top51_ids)
-        row_cls = "" if is_counted else "not-counted"
-        save_cls = "text-save" if p["savings"] > 0 else "text-danger"
-        display_style = 'style="display: none;"' if i >= 20 else ''
-        
-        search_txt = f"{p['name']} {p['position']}".lower()
-        html_lines.append(f"""
-            <tr class="cap-roster-row {row_cls}" data-search="{html.escape(search_txt)}" data-cap="{p['currentCap']}" data-dead="{p['potentialDead']}" data-save="{p['savings']}" {display_style}>
-                <td class="td-rk">{i+1}</td>
-                <td class="td-name">{html.escape(p['name'])} {'<span class="badge-out">枠外</span>' if not is_counted else ''}</td>
-                <td class="td-pos"><span class="pos-tag">{p['position']}</span></td>
-                <td class="td-val {'' if is_counted else 'strike'}">{format_money(p['currentCap'])}</td>
-                <td class="td-val text-muted">{format_money(p['potentialDead'])}</td>
-                <td class="td-val {save_cls}">{format_money(p['savings'])}</td>
-            </tr>
-        """)
+    names = players.name[active].tolist()
+    positions = players.position[active].tolist()
+    caps = curr_cap[active].tolist()
+    pot_deads = curr_pot_dead[active].tolist()
+    saves = savings[active].tolist()
+    counted = counted.tolist()
+    rows = {
+        "rank": range(1, len(active) + 1),
+        "row_cls": ["" if c else "not-counted" for c in counted],
+        "search": [html.escape(f"{name} {pos}".lower()) for name, pos in zip(names, positions)],
+        "cap": caps,
+        "dead": pot_deads,
+        "save": saves,
+        "display_style": ['style="display: none;"' if i >= 20 else '' for i in range(len(active))],
+        "name": [html.escape(name) for name in names],
+        "out_badge": ['' if c else '<span class="badge-out">枠外</span>' for c in counted],
+        "position": positions,
+        "strike_cls": ['' if c else 'strike' for c in counted],
+        "cap_money": [format_money(v) for v in caps],
+        "dead_money": [format_money(v) for v in pot_deads],
+        "save_cls": ["text-save" if v > 0 else "text-danger" for v in saves],
+        "save_money": [format_money(v) for v in saves],
+    }
+    # 1行ずつ html_lines に入れていたときと同じ区切り（"\n"）で連結する
+    if len(active):
+        html_lines.append(CAP_ROSTER_ROW.join_columns(rows, "\n"))
         
     html_lines.append('</tbody></table></div>')
     
-    if len(active_players) > 20:
+    if len(active) > 20:
         html_lines.append('<div class="cap-load-more-container">')
         html_lines.append('<button id="capLoadMoreBtn" class="cap-btn-load-more">さらに表示</button>')
         html_lines.append('</div>')
         
     html_lines.append('</div>')
-    html_lines.append('</div>') 
     
-    js_content = """
-    <p>
-    <script>
-    document.addEventListener("DOMContentLoaded", function () {
-        const searchInput = document.getElementById("capSearchInput");
-        const tableBody = document.querySelector("#capTable tbody");
-        const loadMoreBtn = document.getElementById("capLoadMoreBtn");
-        if(!tableBody) return;
-        
-        const rows = Array.from(tableBody.querySelectorAll(".cap-roster-row"));
-        const headers = document.querySelectorAll("#capTable th.sortable");
-        
-        let sortCol = "cap";
-        let sortDir = -1; 
-        let visibleCount = 20;
-        let currentQuery = "";
-
-        function renderTable() {
-            const query = (searchInput.value || "").toLowerCase().trim();
-            
-            if (query !== currentQuery) {
-                visibleCount = 20;
-                currentQuery = query;
-            }
-            
-            const visibleRows = rows.filter(row => {
-                if (!query) return true;
-                return row.dataset.search.includes(query);
-            });
-            
-            visibleRows.sort((a, b) => {
-                const valA = parseFloat(a.dataset[sortCol]) || 0;
-                const valB = parseFloat(b.dataset[sortCol]) || 0;
-                return (valA - valB) * sortDir;
-            });
-            
-            rows.forEach(r => r.style.display = "none");
-            
-            const rowsToShow = visibleRows.slice(0, visibleCount);
-            rowsToShow.forEach(r => {
-                r.style.display = "";
-                tableBody.appendChild(r);
-            });
-            
-            if (loadMoreBtn) {
-                if (visibleCount < visibleRows.length) {
-                    loadMoreBtn.style.display = "inline-block";
-                } else {
-                    loadMoreBtn.style.display = "none";
-                }
-            }
-        }
-
-        if(searchInput) {
-            searchInput.addEventListener("input", renderTable);
-        }
-        
-        if (loadMoreBtn) {
-            loadMoreBtn.addEventListener("click", () => {
-                visibleCount += 20;
-                renderTable();
-            });
-        }
-
-        headers.forEach(th => {
-            th.addEventListener("click", () => {
-                const col = th.dataset.sort;
-                if (sortCol === col) {
-                    sortDir *= -1;
-                } else {
-                    sortCol = col;
-                    sortDir = -1;
-                }
-                renderTable();
-            });
-        });
-        
-        renderTable();
-    });
-    </script>
-    </p>
-    """
+    whatif_html = build_whatif_html(players, active, config)
+    if whatif_html:
+        html_lines.append(whatif_html)
+    html_lines.append('</div>') 
     
-    html_lines.append(js_content)
+    html_lines.append(f"<p>\n{asset_html('cap.js')}\n</p>")
+    html_lines.append(asset_loader())
     return "\n".join(html_lines)
 
 # ==============================================================================
-# 5. はてなブログ更新
+# 6. はてなブログ更新
 # ==============================================================================
-def update_hatena_blog(content_body):
-    if not TARGET_ENTRY_ID:
-        print("[ERROR] TARGET_ENTRY_ID is missing.", file=sys.stderr)
-        return
+def cap_entry(content_body):
+    # カテゴリは既存エントリのものを維持
+    return Entry(TARGET_ENTRY_ID, f"SALARY CAP // {CONFIG['CURRENT_YEAR']}", content_body, "Cap Dashboard page", keep_categories=True)
 
-    url = f'https://blog.hatena.ne.jp/{HATENA_ID}/{HATENA_BLOG_ID}/atom/page/{TARGET_ENTRY_ID}'
-    
-    print(f"Fetching current entry info from {url}...", file=sys.stderr)
-    try:
-        get_resp = requests.get(url, auth=HTTPBasicAuth(HATENA_ID, HATENA_API_KEY))
-        get_resp.raise_for_status()
-        
-        import xml.etree.ElementTree as ET
-        root = ET.fromstring(get_resp.text)
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-        categories = [c.attrib['term'] for c in root.findall('atom:category', ns)]
-    except Exception as e:
-        print(f"[ERROR] Failed to get current entry: {e}", file=sys.stderr)
-        return
-
-    curr_year = CONFIG["CURRENT_YEAR"]
-    new_title = f"SALARY CAP // {curr_year}"
-
-    escaped_body = html.escape(content_body)
-    escaped_title = html.escape(new_title)
-    categories_xml = "\n".join([f'<category term="{html.escape(c)}" />' for c in categories])
-    
-    xml_data = f"""<?xml version="1.0" encoding="utf-8"?>
-<entry xmlns="http://www.w3.org/2005/Atom"
-       xmlns:app="http://www.w3.org/2007/app">
-  <title>{escaped_title}</title>
-  {categories_xml}
-  <content type="text/html">{escaped_body}</content>
-  <app:control>
-    <app:draft>no</app:draft>
-  </app:control>
-</entry>
-"""
-
-    headers = {'Content-Type': 'application/atom+xml'}
-    response = requests.put(
-        url,
-        data=xml_data.encode('utf-8'),
-        headers=headers,
-        auth=HTTPBasicAuth(HATENA_ID, HATENA_API_KEY)
-    )
-
-    if response.status_code == 200:
-        print("Successfully updated the Cap Dashboard page.", file=sys.stderr)
-    else:
-        print(f"Failed to update blog entry. Status: {response.status_code}", file=sys.stderr)
-        print(response.text, file=sys.stderr)
+def update_hatena_blog(content_body):
+    return update_entry(cap_entry(content_body))
 
 if __name__ == "__main__":
     players_data = fetch_cap_data()
     html_content = generate_html_content(players_data, CONFIG)
+    publish_assets()
     update_hatena_blog(html_content)
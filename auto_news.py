@@ -1,10 +1,8 @@
 import os
-import requests
-import datetime
-import hashlib
-import base64
-import random
 from xml.sax.saxutils import escape
+from notion_api import query_database, get_property_value
+from hatena_publisher import Entry, update_entry
+from html_template import Template, HtmlWriter
 
 # ==========================================
 # 1. 設定情報（GitHub Secretsから取得）
@@ -13,11 +11,7 @@ def get_env(key):
     val = os.getenv(key)
     return val.strip() if val else None
 
-NOTION_TOKEN = get_env("NOTION_TOKEN")
 NOTION_NEWS_DB_ID = get_env("NOTION_NEWS_DB_ID")
-HATENA_USER = get_env("HATENA_USER")
-HATENA_BLOG = get_env("HATENA_BLOG")
-HATENA_API_KEY = get_env("HATENA_API_KEY")
 # アーカイブ用（2025一覧）とバー専用（最新10件）の2つのID
 HATENA_NEWS_PAGE_ID = get_env("HATENA_NEWS_PAGE_ID")
 HATENA_LATEST_NEWS_PAGE_ID = get_env("HATENA_LATEST_NEWS_PAGE_ID")
@@ -38,19 +32,14 @@ TYPE_MAP = {
     "Awards": "awards"
 }
 
+# Notionから取得するプロパティ（フィルタにしか使わない Season は取得不要。Date はソートと表示の両方に使う）
+NOTION_PROPERTIES = ["Formatted News", "Date", "Type", "URL"]
+
 def fetch_news_from_notion(season_filter=None, page_size=100):
     """Notionからニュースを取得。season_filterがあればその年のみ、なければ全期間"""
-    url = f"https://api.notion.com/v1/databases/{NOTION_NEWS_DB_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json"
-    }
-    
     # 基本のクエリ（日付順）
     payload = {
-        "sorts": [{"property": "Date", "direction": "descending"}],
-        "page_size": page_size
+        "sorts": [{"property": "Date", "direction": "descending"}]
     }
     
     # シーズン指定（数値型）がある場合はフィルターを追加
@@ -60,31 +49,25 @@ def fetch_news_from_notion(season_filter=None, page_size=100):
             "number": {"equals": int(season_filter)}
         }
     
-    res = requests.post(url, headers=headers, json=payload)
-    if res.status_code != 200:
-        print(f"Notion Error: {res.text}")
-        res.raise_for_status()
-        
-    data = res.json()
+    # シーズン指定時は全件ページ送り、指定なしは page_size 件で打ち切り
+    pages = query_database(
+        NOTION_NEWS_DB_ID, payload,
+        limit=None if season_filter else page_size,
+        properties=NOTION_PROPERTIES,
+    )
     news_list = []
-    for page in data["results"]:
-        props = page["properties"]
-
+    for page in pages:
         # Formatted News（Formula）から取得
-        formula_obj = props.get("Formatted News", {}).get("formula", {})
-        title = formula_obj.get("string") if formula_obj.get("string") else "No Title"
+        title = get_property_value(page, "Formatted News") or "No Title"
         
         # 日付取得
-        date_obj = props.get("Date", {}).get("date")
-        date = date_obj["start"] if date_obj else "2025-01-01"
+        date = get_property_value(page, "Date") or "2025-01-01"
         
         # タイプ取得
-        type_obj = props.get("Type", {}).get("select")
-        ntype = type_obj["name"] if type_obj else "News"
+        ntype = get_property_value(page, "Type") or "News"
         
         # URL取得
-        url_obj = props.get("URL")
-        url_val = url_obj.get("url") if url_obj else None
+        url_val = get_property_value(page, "URL") or None
         
         news_list.append({
             "date": date.replace("-", "/"),
@@ -94,21 +77,28 @@ def fetch_news_from_notion(season_filter=None, page_size=100):
         })
     return news_list
 
-def generate_full_page_html(news_data):
-    """アーカイブページ（フィルタ機能付き）のHTMLを生成"""
-    items_html = ""
-    for item in news_data:
-        css_type = TYPE_MAP.get(item["type"], "news")
-        title_part = f'<a href="{item["url"]}" class="news-item-title">{escape(item["title"])}</a>' if item["url"] else f'<span class="news-item-title">{escape(item["title"])}</span>'
-        
-        items_html += f'''
+NEWS_ITEM = Template('''
 <li class="news-item" data-type="{css_type}">
-    <span class="news-item-date">{item["date"]}</span>
-    <span class="news-item-type-col"><span class="news-item-type news-item-type--{css_type}">{item["type"]}</span></span>
+    <span class="news-item-date">{date}</span>
+    <span class="news-item-type-col"><span class="news-item-type news-item-type--{css_type}">{type}</span></span>
     {title_part}
-</li>'''
+</li>''')
+
+def news_item_columns(news_data):
+    """アーカイブページとニュースバーで共通の <li> 一覧（NEWS_ITEM の列）"""
+    types = [item["type"] for item in news_data]
+    return {
+        "css_type": [TYPE_MAP.get(t, "news") for t in types],
+        "date": [item["date"] for item in news_data],
+        "type": types,
+        "title_part": [
+            f'<a href="{item["url"]}" class="news-item-title">{escape(item["title"])}</a>' if item["url"] else f'<span class="news-item-title">{escape(item["title"])}</span>'
+            for item in news_data
+        ],
+    }
 
-    return f'''
+# アーカイブページ（フィルタ機能付き）。<li> 一覧の前後
+NEWS_PAGE_HEAD = '''
 <div class="news-list-wrapper">
     <div class="news-filter-bar">
         <button class="news-filter-btn is-active" data-filter="all">All</button> 
@@ -123,90 +113,76 @@ def generate_full_page_html(news_data):
         <button class="news-filter-btn" data-filter="awards">Awards</button>
     </div>
     <ul class="news-list js-news-list">
-        {items_html}
+        '''
+NEWS_PAGE_TAIL = '''
     </ul>
 </div>
 
 <script>
-document.addEventListener("DOMContentLoaded", function () {{
+document.addEventListener("DOMContentLoaded", function () {
     const list = document.querySelector(".js-news-list");
     if (!list) return;
     const items = Array.from(list.querySelectorAll(".news-item"));
     const buttons = Array.from(document.querySelectorAll(".news-filter-btn"));
 
-    buttons.forEach((btn) => {{
-        btn.addEventListener("click", () => {{
+    buttons.forEach((btn) => {
+        btn.addEventListener("click", () => {
             const filter = btn.dataset.filter;
             buttons.forEach((b) => b.classList.remove("is-active"));
             btn.classList.add("is-active");
 
-            items.forEach((item) => {{
+            items.forEach((item) => {
                 const t = item.dataset.type;
-                if (filter === "all" || filter === t) {{
+                if (filter === "all" || filter === t) {
                     item.style.display = "";
-                }} else {{
+                } else {
                     item.style.display = "none";
-                }}
-            }});
-        }});
-    }});
-}});
+                }
+            });
+        });
+    });
+});
 </script>
 '''
 
-def generate_bar_snippet_html(news_data):
+def generate_full_page_html(news_data, out=None):
+    """アーカイブページ（フィルタ機能付き）のHTMLを生成。out を渡すとそこへ書き出す（HtmlWriter 参照）"""
+    writer = HtmlWriter(out)
+    writer.write(NEWS_PAGE_HEAD)
+    writer.writelines(NEWS_ITEM.render_columns(news_item_columns(news_data)))
+    writer.write(NEWS_PAGE_TAIL)
+    return writer.result()
+
+def generate_bar_snippet_html(news_data, out=None):
     """ニュースバーが読み込むための、純粋なリストのみのHTMLを生成"""
-    items_html = ""
-    for item in news_data:
-        css_type = TYPE_MAP.get(item["type"], "news")
-        title_part = f'<a href="{item["url"]}" class="news-item-title">{escape(item["title"])}</a>' if item["url"] else f'<span class="news-item-title">{escape(item["title"])}</span>'
-        
-        items_html += f'''
-<li class="news-item" data-type="{css_type}">
-    <span class="news-item-date">{item["date"]}</span>
-    <span class="news-item-type-col"><span class="news-item-type news-item-type--{css_type}">{item["type"]}</span></span>
-    {title_part}
-</li>'''
-    return f'<ul class="news-list js-news-list">{items_html}</ul>'
+    writer = HtmlWriter(out)
+    writer.write('<ul class="news-list js-news-list">')
+    writer.writelines(NEWS_ITEM.render_columns(news_item_columns(news_data)))
+    writer.write('</ul>')
+    return writer.result()
 
-def update_hatena_page(page_id, title, html_content):
-    """はてなブログの指定IDのページを更新"""
-    url = f"https://blog.hatena.ne.jp/{HATENA_USER}/{HATENA_BLOG}/atom/page/{page_id}"
-    
-    created = datetime.datetime.now().isoformat() + "Z"
-    nonce = hashlib.sha1(str(random.random()).encode()).digest()
-    digest = hashlib.sha1(nonce + created.encode() + HATENA_API_KEY.encode()).digest()
-    wsse = f'UsernameToken Username="{HATENA_USER}", PasswordDigest="{base64.b64encode(digest).decode()}", Nonce="{base64.b64encode(nonce).decode()}", Created="{created}"'
-    
-    xml_data = f'''<?xml version="1.0" encoding="utf-8"?>
-<entry xmlns="http://www.w3.org/2005/Atom">
-  <title>{title}</title>
-  <content type="text/html">
-    {escape(html_content)}
-  </content>
-</entry>'''
-
-    headers = {"X-WSSE": wsse, "Content-Type": "application/xml"}
-    res = requests.put(url, data=xml_data.encode('utf-8'), headers=headers)
-    
-    if res.status_code == 200:
-        print(f"Successfully updated: {title}")
-    else:
-        print(f"Failed to update {title}. Status: {res.status_code}")
-        print(res.text)
+def archive_news_entry(archive_news):
+    return Entry(HATENA_NEWS_PAGE_ID, f"NEWS // {TARGET_SEASON}", generate_full_page_html(archive_news), "news archive")
+
+def latest_news_entry(latest_news):
+    return Entry(HATENA_LATEST_NEWS_PAGE_ID, "LATEST_NEWS_BAR_DATA", generate_bar_snippet_html(latest_news), "news bar")
+
+def publish_archive_news(archive_news):
+    return update_entry(archive_news_entry(archive_news))
+
+def publish_latest_news(latest_news):
+    return update_entry(latest_news_entry(latest_news))
 
 def main():
     # 1. アーカイブ用データ取得 (2025年全件)
     print(f"Fetching {TARGET_SEASON} News for Archive...")
     archive_news = fetch_news_from_notion(season_filter=TARGET_SEASON, page_size=100)
-    archive_html = generate_full_page_html(archive_news)
-    update_hatena_page(HATENA_NEWS_PAGE_ID, f"NEWS // {TARGET_SEASON}", archive_html)
+    publish_archive_news(archive_news)
     
     # 2. ニュースバー用データ取得 (全期間から最新10件)
     print("Fetching Global Latest News for Bar...")
     latest_news = fetch_news_from_notion(season_filter=None, page_size=10)
-    bar_html = generate_bar_snippet_html(latest_news)
-    update_hatena_page(HATENA_LATEST_NEWS_PAGE_ID, "LATEST_NEWS_BAR_DATA", bar_html)
+    publish_latest_news(latest_news)
 
 if __name__ == "__main__":
     main()
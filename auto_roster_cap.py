@@ -0,0 +1,61 @@
+import sys
+import auto_roster
+import auto_cap
+from notion_api import iter_pages, extract_columns, any_of
+from hatena_publisher import publish_entries
+from hatena_assets import publish_assets
+
+# ==============================================================================
+# ロスター + サラリーキャップ 一括更新
+#   auto_roster.py と auto_cap.py は同じ NOTION_ROSTER_DB_ID を参照するため、
+#   ロスターDBを1回だけ取得して、同じページデータから両方のページを生成する。
+#   ページは届いた順に列ごとのリストへ展開し、生のページJSONは保持しない。
+# ==============================================================================
+
+def select_properties(names):
+    """ロスター・キャップの両方が参照するプロパティをまとめて取得する"""
+    roster_props = set(auto_roster.select_properties(names))
+    cap_props = set(auto_cap.select_properties(names))
+    return [n for n in names if n in roster_props or n in cap_props]
+
+def notion_filter():
+    """ロスター・キャップのどちらかで表示される選手だけをまとめて取得する"""
+    return any_of(auto_roster.notion_filter(), auto_cap.notion_filter())
+
+def columns(names):
+    """ロスター・キャップの両方で使う列"""
+    roster_cols = auto_roster.roster_columns(names)
+    return roster_cols + [n for n in auto_cap.NOTION_PROPERTIES if n not in roster_cols]
+
+def fetch_roster_cap_data():
+    """ロスターDBを1回だけ取得し、届いたページから両方で使う列を一度に展開する"""
+    query_filter = notion_filter()
+    payload = {"filter": query_filter} if query_filter else None
+
+    pages = iter_pages(auto_roster.ROSTER_DB_ID, payload, properties=select_properties)
+    table = extract_columns(pages, columns, with_ids=True)
+    return auto_roster.roster_frame(table), auto_cap.players_from_columns(table)
+
+def roster_cap_entries(data):
+    roster_df, players = data
+    return [
+        # 1. ロスターページ（分割公開時はポジション別フラグメントを含む）
+        *auto_roster.roster_entries(roster_df),
+        # 2. サラリーキャップページ
+        auto_cap.cap_entry(auto_cap.generate_html_content(players, auto_cap.CONFIG)),
+    ]
+
+def publish_roster_and_cap(data):
+    return publish_entries(roster_cap_entries(data))
+
+def main():
+    print("Fetching roster database from Notion (roster + cap)...", file=sys.stderr)
+    data = fetch_roster_cap_data()
+    failed = [] if publish_assets() else ["assets"]
+    failed += publish_roster_and_cap(data)
+    if failed:
+        print(f"[ERROR] failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
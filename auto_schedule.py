@@ -1,12 +1,15 @@
+import numpy as np
 import pandas as pd
-import requests
-import datetime
-import hashlib
-import base64
-import random
 import os
 import unicodedata
-from xml.sax.saxutils import escape
+from notion_api import query_database, get_property_value
+from hatena_publisher import Entry, publish_entries
+from hatena_assets import asset_html, asset_loader, publish_assets
+from html_template import (
+    TEAM_BADGE, SCHEDULE_PC_ROW, SCHEDULE_MOBILE_ROW, SCHEDULE_MOBILE_BYE_ROW,
+    SCORE_SLIDE, SCORE_SLIDE_BYE, RECORD_PILL, HtmlWriter,
+)
+from team_records import POSTSEASON_WEEKS, record_splits
 
 # ==========================================
 # 0. SEASON SETTINGS (シーズンが変わったらここを変更)
@@ -17,11 +20,7 @@ CURRENT_SEASON = 2025
 # ==========================================
 # 1. 設定情報
 # ==========================================
-NOTION_TOKEN = os.getenv("NOTION_TOKEN")
 NOTION_SCHEDULE_DB_ID = os.getenv("NOTION_SCHEDULE_DB_ID")
-HATENA_USER = os.getenv("HATENA_USER")
-HATENA_BLOG = os.getenv("HATENA_BLOG")
-HATENA_API_KEY = os.getenv("HATENA_API_KEY")
 HATENA_SCHEDULE_PAGE_ID = os.getenv("HATENA_SCHEDULE_PAGE_ID")
 HATENA_LATEST_SCHEDULE_PAGE_ID = os.getenv("HATENA_LATEST_SCHEDULE_PAGE_ID")
 
@@ -29,244 +28,143 @@ HATENA_LATEST_SCHEDULE_PAGE_ID = os.getenv("HATENA_LATEST_SCHEDULE_PAGE_ID")
 script_dir = os.path.dirname(os.path.abspath(__file__))
 color_path = os.path.join(script_dir, "team_color.xlsx")
 
-# チーム情報マップ
-TEAM_INFO = {
-    "JAX": ("AFC", "South"),
-    "HOU": ("AFC", "South"),
-    "IND": ("AFC", "South"),
-    "TEN": ("AFC", "South"),
-    "BUF": ("AFC", "East"),
-    "MIA": ("AFC", "East"),
-    "NYJ": ("AFC", "East"),
-    "NE": ("AFC", "East"),
-    "BAL": ("AFC", "North"),
-    "PIT": ("AFC", "North"),
-    "CLE": ("AFC", "North"),
-    "CIN": ("AFC", "North"),
-    "KC": ("AFC", "West"),
-    "LAC": ("AFC", "West"),
-    "DEN": ("AFC", "West"),
-    "LV": ("AFC", "West"),
-    "PHI": ("NFC", "East"),
-    "DAL": ("NFC", "East"),
-    "NYG": ("NFC", "East"),
-    "WAS": ("NFC", "East"),
-    "GB": ("NFC", "North"),
-    "MIN": ("NFC", "North"),
-    "CHI": ("NFC", "North"),
-    "DET": ("NFC", "North"),
-    "TB": ("NFC", "South"),
-    "NO": ("NFC", "South"),
-    "ATL": ("NFC", "South"),
-    "CAR": ("NFC", "South"),
-    "SF": ("NFC", "West"),
-    "SEA": ("NFC", "West"),
-    "LAR": ("NFC", "West"),
-    "ARI": ("NFC", "West"),
-}
-JAX_CONF, JAX_DIV = "AFC", "South"
-POSTSEASON_WEEKS = ["WC", "DIV", "CONF", "SB"]
+# タブ (ID, PC表示名, スマホ表示名)。ポストシーズンは試合がなければ出さない
+SCHEDULE_TABS = [("pre", "Preseason", "PRE"), ("reg", "Regular Season", "RS"), ("post", "Postseason", "POST")]
 
 # ==========================================
 # 2. ロジック関数群
 # ==========================================
 
-def _count_record_schedule(df, win_col="win"):
-    if df.empty or win_col not in df.columns:
-        return ""
-    wins = (df[win_col] == "Win").sum()
-    losses = (df[win_col] == "Lose").sum()
-    ties = (df[win_col] == "Draw").sum()
-    return f"{int(wins)}-{int(losses)}" + (f"-{int(ties)}" if ties > 0 else "")
-
-
-def _compute_streak_schedule(df):
-    if "win" not in df.columns or df.empty:
-        return ""
-    results = [r for r in df["win"].tolist() if isinstance(r, str) and r.strip() != "" and r in ("Win", "Lose", "Draw")]
-    if not results:
-        return ""
-    last = results[-1]
-    count = 0
-    for r in reversed(results):
-        if r == last:
-            count += 1
-        else:
-            break
-    code = {"Win": "W", "Lose": "L", "Draw": "D"}.get(last, "")
-    return f"{code}{count}"
-
-
 def build_schedule_record_bar(schedule_df):
-    s = schedule_df["week"].astype(str)
-    reg = schedule_df[~s.str.startswith("Pre") & ~schedule_df["week"].isin(POSTSEASON_WEEKS)].copy()
-    played = reg[reg["win"].isin(["Win", "Lose", "Draw"])].copy()
-    if played.empty:
+    splits = record_splits(schedule_df)
+    if not splits.games:
         return '<div id="schedule-record-bar"><div class="jax-record-inner"><div class="jax-record-main"><span class="jax-record-team">JAX</span><span class="jax-record-overall">0-0</span></div></div></div>'
 
-    overall = _count_record_schedule(played)
-    conf_div_df = played["opponent"].map(lambda t: TEAM_INFO.get(str(t), (None, None))).apply(pd.Series)
-    conf_div_df.columns = ["_opp_conf", "_opp_div"]
-    played = played.join(conf_div_df)
-
-    div_record = _count_record_schedule(played[(played["_opp_conf"] == JAX_CONF) & (played["_opp_div"] == JAX_DIV)])
-    conf_record = _count_record_schedule(played[played["_opp_conf"] == JAX_CONF])
-    nfc_record = _count_record_schedule(played[played["_opp_conf"] == "NFC"])
-    home_record = _count_record_schedule(played[played["home"] == "Home"])
-    away_record = _count_record_schedule(played[played["home"] == "Away"])
-    streak = _compute_streak_schedule(played)
-
     div_pill = (
-        f"<span class='jax-record-pill jax-record-pill-division'><span class='jax-record-label'>Division</span> <span class='jax-record-num'>{div_record}</span></span>"
-        if div_record
+        RECORD_PILL.render({"cls": "jax-record-pill jax-record-pill-division", "label": "Division", "num": splits.division})
+        if splits.division
         else ""
     )
 
-    pills = []
-    if conf_record:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Conference</span> <span class='jax-record-num'>{conf_record}</span></span>"
-        )
-    if nfc_record:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>NFC</span> <span class='jax-record-num'>{nfc_record}</span></span>"
-        )
-    if home_record:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Home</span> <span class='jax-record-num'>{home_record}</span></span>"
-        )
-    if away_record:
-        pills.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Away</span> <span class='jax-record-num'>{away_record}</span></span>"
-        )
+    pills = [
+        RECORD_PILL.render({"cls": "jax-record-pill", "label": label, "num": num})
+        for label, num in [("Conference", splits.conference), ("NFC", splits.nfc), ("Home", splits.home), ("Away", splits.away)]
+        if num
+    ]
 
-    if streak and len(streak) > 1 and int(streak[1:]) >= 2:
+    if splits.streak_count >= 2:
         cls = "jax-record-pill jax-record-streak" + (
             " jax-record-streak-loss"
-            if streak.startswith("L")
-            else " jax-record-streak-draw" if streak.startswith("D") else ""
-        )
-        pills.append(
-            f"<span class='{cls}'><span class='jax-record-label'>Streak</span> <span class='jax-record-num'>{streak}</span></span>"
+            if splits.streak_code == "L"
+            else " jax-record-streak-draw" if splits.streak_code == "D" else ""
         )
+        pills.append(RECORD_PILL.render({"cls": cls, "label": "Streak", "num": f"{splits.streak_code}{splits.streak_count}"}))
 
     return f"""
 <div id="schedule-record-bar">
   <div class="jax-record-inner">
-    <div class="jax-record-main"><span class="jax-record-team">JAX</span> <span class="jax-record-overall">{overall}</span> {div_pill}</div>
+    <div class="jax-record-main"><span class="jax-record-team">JAX</span> <span class="jax-record-overall">{splits.overall}</span> {div_pill}</div>
     <div class="jax-record-splits">{' '.join(pills)}</div>
   </div>
 </div>""".strip()
 
 
-def build_pc_table(df):
-    html = '<div class="schedule-desktop"><table class="schedule-table"><thead><tr><th>Week</th><th>Date & Time</th><th>Opponent</th><th>Home/Away</th><th>Score</th><th>Result</th></tr></thead><tbody>'
-    for _, r in df.iterrows():
-        opp = (
-            "BYE"
-            if str(r["opponent"]).upper() == "BYE"
-            else f'<span class="team-badge" style="background:{r.get("bg","#ccc")};color:{r.get("fg","#000")};">{r["opponent"]}</span>'
-        )
-        html += f'<tr class="{r["class"]}"><th scope="row">{r["week"]}</th><td>{r["datetime_str"]}</td><td>{opp}</td><td class="venue {r["venue_class"]}">{r["home"]}</td><td>{r["score"]}</td><td>{r["result"]}</td></tr>'
-    return html + "</tbody></table></div>"
+PC_TABLE_HEAD = '<div class="schedule-desktop"><table class="schedule-table"><thead><tr><th>Week</th><th>Date & Time</th><th>Opponent</th><th>Home/Away</th><th>Score</th><th>Result</th></tr></thead><tbody>'
+MOBILE_TABLE_HEAD = '<div class="schedule-mobile"><table class="schedule-table mobile-compact"><thead><tr><th>Week</th><th>Date</th><th>Opponent</th><th>Score</th></tr></thead><tbody>'
+TABLE_TAIL = "</tbody></table></div>"
 
 
-def build_mobile_table(df):
-    html = '<div class="schedule-mobile"><table class="schedule-table mobile-compact"><thead><tr><th>Week</th><th>Date</th><th>Opponent</th><th>Score</th></tr></thead><tbody>'
-    for _, r in df.iterrows():
-        if str(r.get("opponent", "")).upper() == "BYE":
-            html += f'<tr class="{r["class"]}"><td>{r["week"]}</td><td></td><td>BYE</td><td></td></tr>'
+def render_schedule(df):
+    """PC表・モバイル表（タブごと）とスコアバーのスライドの行を、行を1回たどるだけで作る
+    （表示用の列は prepare_schedule_df で作っておく）。戻り値: ({タブID: (PC表の行, モバイル表の行)}, スライド)"""
+    rows = {tid: ([], []) for tid, _, _ in SCHEDULE_TABS}
+    slides = []
+    for r in df.to_dict("records"):
+        pc_rows, mobile_rows = rows[r["tab"]]
+        pc_rows.append(SCHEDULE_PC_ROW.render(r))
+        if r["is_bye"]:
+            mobile_rows.append(SCHEDULE_MOBILE_BYE_ROW.render(r))
+            slides.append(SCORE_SLIDE_BYE.render(r))
         else:
-            sym = "vs" if r["venue_class"] == "home" else "@"
-            res = f'<small class="result {r["class"]}">{r["result"]}</small>' if r["result"] in ["W", "L", "D"] else ""
-            opp = f'<span class="venue {r["venue_class"]}">{sym}</span><span class="team-badge" style="background:{r.get("bg","#ccc")}; color:{r.get("fg","#000")};">{r["opponent"]}</span>'
-            html += f'<tr class="{r["class"]}"><td>{r["week"]}</td><td>{r["date"]}<br><small>{r["time"] or "TBD"}</small></td><td>{opp}</td><td>{r["score"]}<br>{res}</td></tr>'
-    return html + "</tbody></table></div>"
+            mobile_rows.append(SCHEDULE_MOBILE_ROW.render(r))
+            slides.append(SCORE_SLIDE.render(r))
+
+    tables = {tid: tab_rows for tid, tab_rows in rows.items() if tab_rows[0] or tid != "post"}
+    return tables, slides
+
+
+def build_schedule_page_html(df, tables, out=None):
+    """スケジュールページ本体（tables は render_schedule の戻り値）。out を渡すとそこへ書き出す"""
+    writer = HtmlWriter(out)
+    writer.write(build_schedule_record_bar(df))
+
+    writer.write('<div class="tab-buttons">')
+    for tid, pc_lbl, sp_lbl in SCHEDULE_TABS:
+        if tid in tables:
+            writer.write(f'<button class="tab-btn" data-sp="{sp_lbl}" data-target="{tid}">{pc_lbl}</button>')
+    writer.write("</div>")
+    for tid, (pc_rows, mobile_rows) in tables.items():
+        writer.write(f'<div class="tab-content" id="{tid}" style="display:none;">')
+        writer.write(PC_TABLE_HEAD)
+        writer.writelines(pc_rows)
+        writer.write(TABLE_TAIL)
+        writer.write(MOBILE_TABLE_HEAD)
+        writer.writelines(mobile_rows)
+        writer.write(TABLE_TAIL)
+        writer.write("</div>")
+
+    # JavaScript（タブ切り替えは assets/schedule-tabs.js）
+    writer.write(asset_html("schedule-tabs.js"))
+    writer.write(asset_loader())
+    return writer.result()
 
 
 # ==========================================
 # 2.5 ヘッダー専用Snippetの生成
 # ==========================================
 
-def build_header_snippet_data(df):
-    # --- 1. スコアスライド生成 ---
-    slides_html = ""
-    for _, r in df.iterrows():
-        if str(r["opponent"]).upper() == "BYE":
-            slides_html += f"<div class='schedule-slide bye' data-date=''><div class='line1'><span class='week'>{r['week']}</span></div><div class='line2'><span class='opponent'>BYE</span></div></div>"
-        else:
-            sym = "vs" if r["venue_class"] == "home" else "@"
-            dt_obj = r["datetime"]
-            clean_date = dt_obj.strftime("%Y-%m-%dT%H:%M:%S") if not pd.isna(dt_obj) else ""
-            try:
-                dt_display = dt_obj.strftime("%-m/%-d (%a) %H:%M JST")
-            except:
-                dt_display = dt_obj.strftime("%#m/%#d (%a) %H:%M JST")
-            res_val = f"{r['result']} {r['score']}" if r["result"] in ["W", "L", "D"] else "-"
-            slides_html += f"<div class='schedule-slide {r['class']}' data-date='{clean_date}'><div class='line1'><span class='week'>{r['week']}</span>　{dt_display}</div><div class='line2'><span class='opponent'><span class='venue {r['venue_class']}'>{sym}</span><span class='team-badge' style='background:{r.get('bg','#ccc')};color:{r.get('fg','#000')};'>{r['opponent']}</span></span><span class='result'>{res_val}</span></div></div>"
+def build_header_snippet_data(df, slides=None, out=None):
+    """ヘッダーのスコアバー + 戦績バー。out を渡すとそこへ書き出す"""
+    writer = HtmlWriter(out)
+
+    # --- 1. スコアスライド（render_schedule で表と一緒に作ったものがあればそれを使う） ---
+    if slides is None:
+        slides = render_schedule(df)[1]
 
     # score-bar部分
-    score_bar = f"<div id='score-bar'><div class='schedule-carousel-wrapper'><button class='schedule-nav schedule-prev'>◀</button><div class='schedule-carousel-viewport'><div class='schedule-carousel'>{slides_html}</div></div><button class='schedule-nav schedule-next'>▶</button></div></div>"
+    writer.write("<div id='score-bar'><div class='schedule-carousel-wrapper'><button class='schedule-nav schedule-prev'>◀</button><div class='schedule-carousel-viewport'><div class='schedule-carousel'>")
+    writer.writelines(slides)
+    writer.write("</div></div><button class='schedule-nav schedule-next'>▶</button></div></div>")
 
     # --- 2. 戦績データの計算 ---
-    s = df["week"].astype(str)
-    reg = df[~s.str.startswith("Pre") & ~df["week"].isin(POSTSEASON_WEEKS)].copy()
-    played = reg[reg["win"].isin(["Win", "Lose", "Draw"])].copy()
-    overall = _count_record_schedule(played) if not played.empty else "0-0"
-    conf_div_df = played["opponent"].map(lambda t: TEAM_INFO.get(str(t), (None, None))).apply(pd.Series)
-    conf_div_df.columns = ["_opp_conf", "_opp_div"]
-    played = played.join(conf_div_df)
-    div_r = _count_record_schedule(played[(played["_opp_conf"] == JAX_CONF) & (played["_opp_div"] == JAX_DIV)])
-    conf_r = _count_record_schedule(played[played["_opp_conf"] == JAX_CONF])
-    nfc_r = _count_record_schedule(played[played["_opp_conf"] == "NFC"])
-    home_r = _count_record_schedule(played[played["home"] == "Home"])
-    away_r = _count_record_schedule(played[played["home"] == "Away"])
-    streak_v = _compute_streak_schedule(played)
+    splits = record_splits(df)
+    overall = splits.overall or "0-0"
 
     div_pill = (
-        f"<span class='jax-record-pill jax-record-pill-division'><span class='jax-record-label'>Div</span> <span class='jax-record-num'>{div_r}</span></span>"
-        if div_r
+        RECORD_PILL.render({"cls": "jax-record-pill jax-record-pill-division", "label": "Div", "num": splits.division})
+        if splits.division
         else ""
     )
-    splits = []
-    if conf_r:
-        splits.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Conf</span> <span class='jax-record-num'>{conf_r}</span></span>"
-        )
-    if nfc_r:
-        splits.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>NFC</span> <span class='jax-record-num'>{nfc_r}</span></span>"
-        )
-    if home_r:
-        splits.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Home</span> <span class='jax-record-num'>{home_r}</span></span>"
-        )
-    if away_r:
-        splits.append(
-            f"<span class='jax-record-pill'><span class='jax-record-label'>Away</span> <span class='jax-record-num'>{away_r}</span></span>"
-        )
-    if streak_v:
-        splits.append(
-            f"<span class='jax-record-pill jax-record-streak'><span class='jax-record-label'>Streak</span> <span class='jax-record-num'>{streak_v}</span></span>"
-        )
+    pills = [
+        RECORD_PILL.render({"cls": "jax-record-pill", "label": label, "num": num})
+        for label, num in [("Conf", splits.conference), ("NFC", splits.nfc), ("Home", splits.home), ("Away", splits.away)]
+        if num
+    ]
+    if splits.streak_count:
+        pills.append(RECORD_PILL.render({"cls": "jax-record-pill jax-record-streak", "label": "Streak", "num": f"{splits.streak_code}{splits.streak_count}"}))
 
     # jax-record-bar部分
-    record_bar = f"<div id='jax-record-bar'><div class='jax-record-inner'><button class='jax-record-main' type='button' aria-expanded='false'><span class='jax-record-team'>JAX</span><span class='jax-record-overall'>{overall}</span>{div_pill}<span class='jax-record-chevron' aria-hidden='true'>▼</span></button><div class='jax-record-details'><div class='jax-record-splits'>{''.join(splits)}</div></div></div></div>"
-
-    return f"{score_bar}{record_bar}"
+    writer.write(f"<div id='jax-record-bar'><div class='jax-record-inner'><button class='jax-record-main' type='button' aria-expanded='false'><span class='jax-record-team'>JAX</span><span class='jax-record-overall'>{overall}</span>{div_pill}<span class='jax-record-chevron' aria-hidden='true'>▼</span></button><div class='jax-record-details'><div class='jax-record-splits'>{''.join(pills)}</div></div></div></div>")
+    return writer.result()
 
 # ==========================================
 # 3. メイン処理（API取得と更新）
 # ==========================================
 
+# Notionから取得するプロパティ（fetch_from_notion が参照するもののみ）
+NOTION_PROPERTIES = ["Week", "チーム", "Home/Away", "Score", "Win/Lose", "試合日時（日本時間）", "Sort No"]
+
 def fetch_from_notion():
-    url = f"https://api.notion.com/v1/databases/{NOTION_SCHEDULE_DB_ID}/query"
-    headers = {
-        "Authorization": f"Bearer {NOTION_TOKEN}",
-        "Notion-Version": "2022-06-28",
-        "Content-Type": "application/json",
-    }
-    
     # ★変更点: CURRENT_SEASON と一致する Season プロパティのデータのみ取得
     payload = {
         "filter": {
@@ -284,39 +182,100 @@ def fetch_from_notion():
         ]
     }
     
-    res = requests.post(url, headers=headers, json=payload)
-    res.raise_for_status()
     rows = []
-    for page in res.json()["results"]:
-        p = page["properties"]
-        dt_prop = p.get("試合日時（日本時間）", {}).get("date")
-        team_obj = p.get("チーム", {}).get("select")
-        ha_obj = p.get("Home/Away", {}).get("select")
-        win_obj = p.get("Win/Lose", {}).get("select")
-        score_list = p.get("Score", {}).get("rich_text", [])
-        week_list = p.get("Week", {}).get("title", [])
+    for page in query_database(NOTION_SCHEDULE_DB_ID, payload, properties=NOTION_PROPERTIES):
         rows.append(
             {
-                "week": week_list[0].get("plain_text", "") if week_list else "",
-                "opponent": team_obj.get("name") if team_obj else "BYE",
-                "home": ha_obj.get("name") if ha_obj else "",
-                "score": score_list[0].get("plain_text", "-") if score_list else "-",
-                "win": win_obj.get("name") if win_obj else "",
-                "試合日時（日本時間）": dt_prop["start"] if dt_prop else "",
-                "sort_no": p.get("Sort No", {}).get("number") or 999,
+                "week": get_property_value(page, "Week"),
+                "opponent": get_property_value(page, "チーム") or "BYE",
+                "home": get_property_value(page, "Home/Away"),
+                "score": get_property_value(page, "Score") or "-",
+                "win": get_property_value(page, "Win/Lose"),
+                "試合日時（日本時間）": get_property_value(page, "試合日時（日本時間）"),
+                "sort_no": get_property_value(page, "Sort No") or 999,
             }
         )
     return pd.DataFrame(rows)
 
 
-def update_hatena(page_id, title, content):
-    url = f"https://blog.hatena.ne.jp/{HATENA_USER}/{HATENA_BLOG}/atom/page/{page_id}"
-    created = datetime.datetime.now().isoformat() + "Z"
-    nonce = hashlib.sha1(str(random.random()).encode()).digest()
-    digest = base64.b64encode(hashlib.sha1(nonce + created.encode() + HATENA_API_KEY.encode()).digest()).decode()
-    wsse = f'UsernameToken Username="{HATENA_USER}", PasswordDigest="{digest}", Nonce="{base64.b64encode(nonce).decode()}", Created="{created}"'
-    xml = f'<?xml version="1.0" encoding="utf-8"?><entry xmlns="http://www.w3.org/2005/Atom"><title>{title}</title><content type="text/html">{escape(content)}</content></entry>'
-    requests.put(url, data=xml.encode("utf-8"), headers={"X-WSSE": wsse, "Content-Type": "application/xml"})
+def prepare_schedule_df(df):
+    """Notionから取得したスケジュールを表示用に整形（並び替え・日時・結果・チームカラー）"""
+    colors_df = pd.read_excel(color_path)
+
+    # 1. Sort No で並び替え (念のためPython側でも)
+    df = df.sort_values("sort_no").reset_index(drop=True)
+
+    # 2. 日時整形
+    raw_dates = df["試合日時（日本時間）"].fillna("").astype(str)
+    df["datetime"] = pd.to_datetime(
+        raw_dates.str.replace(r"\s*\(.*\)", "", regex=True).str.strip(), errors="coerce"
+    )
+    if df["datetime"].dt.tz is not None:
+        df["datetime"] = df["datetime"].dt.tz_localize(None)
+
+    dt = df["datetime"]
+    has_time = raw_dates.str.contains("T") | raw_dates.str.contains(":")
+    df["datetime_str"] = (
+        dt.dt.strftime("%Y/%m/%d %H:%M").where(has_time, dt.dt.strftime("%Y/%m/%d") + " TBD").where(dt.notna(), "TBD")
+    )
+
+    # 3. その他整形
+    df["result"] = df["win"].map({"Win": "W", "Lose": "L", "Draw": "D"}).fillna("-")
+    df["venue_class"] = df["home"].map({"Home": "home", "Away": "away"}).fillna("")
+    df["score"] = df["score"].fillna("-")
+    df["class"] = df["result"].map({"W": "win", "L": "loss", "D": "draw"}).fillna("upcoming")
+
+    future = df[(df["datetime"] > pd.Timestamp.today()) & (df["score"] == "-")]
+    if not future.empty:
+        df.loc[future["datetime"].idxmin(), "class"] = "next-game"
+
+    bye_mask = df["opponent"].str.upper() == "BYE"
+    df.loc[bye_mask, ["datetime_str", "score", "result"]] = ""
+    df.loc[bye_mask, "class"] = "bye"
+    df["is_bye"] = bye_mask
+
+    colors_df = colors_df.rename(columns={"Team": "opponent", "Color 1": "bg", "Color 2": "fg"})
+    df = pd.merge(df, colors_df, on="opponent", how="left")
+
+    # 4. 表・スコアバー用の列（render_schedule がそのままテンプレートに渡す）
+    week = df["week"].astype(str)
+    df["tab"] = np.select([week.str.startswith("Pre"), df["week"].isin(POSTSEASON_WEEKS)], ["pre", "post"], "reg")
+    dt = df["datetime"]
+    df["date"] = dt.dt.strftime("%Y/%m/%d")
+    df["time"] = dt.dt.strftime("%H:%M").fillna("TBD")
+    df["date_iso"] = dt.dt.strftime("%Y-%m-%dT%H:%M:%S").fillna("").where(~df["is_bye"], "")
+    # "09/08 (Mon) ..." の月日の先頭の 0 を落とす（strftime の %-m は環境依存なので使わない）
+    df["when"] = dt.dt.strftime("%m/%d (%a) %H:%M JST").str.replace(r"^0?(\d+)/0?(\d+)", r"\1/\2", regex=True).fillna("TBD")
+    df["sym"] = np.where(df["venue_class"] == "home", "vs", "@")
+    played = df["result"].isin(["W", "L", "D"])
+    df["result_tag"] = ('<small class="result ' + df["class"] + '">' + df["result"] + "</small>").where(played, "")
+    df["result_score"] = (df["result"] + " " + df["score"]).where(played, "-")
+    df["opp"] = TEAM_BADGE.render_columns({c: df[c].tolist() for c in TEAM_BADGE.fields})
+    df.loc[df["is_bye"], "opp"] = "BYE"
+    return df
+
+
+def build_schedule_pages(df):
+    """整形済みのスケジュールから、更新対象ページ（Entry）のリストを生成"""
+    # HTML組み立て（表とスコアバーのスライドは1回の走査で作る）
+    tables, slides = render_schedule(df)
+    full_html = build_schedule_page_html(df, tables)
+
+    # メイン (ページタイトルも自動で年度が入るように修正)
+    pages = [Entry(HATENA_SCHEDULE_PAGE_ID, f"SCHEDULE // {CURRENT_SEASON}", full_html, "schedule")]
+
+    # ヘッダー用Snippet
+    if HATENA_LATEST_SCHEDULE_PAGE_ID:
+        pages.append(Entry(HATENA_LATEST_SCHEDULE_PAGE_ID, "LATEST_DATA", build_header_snippet_data(df, slides), "schedule snippet"))
+    return pages
+
+
+def schedule_entries(df):
+    return build_schedule_pages(prepare_schedule_df(df))
+
+
+def publish_schedule(df):
+    return publish_entries(schedule_entries(df))
 
 
 def main():
@@ -329,135 +288,8 @@ def main():
             print("データが見つかりませんでした。Seasonプロパティを確認してください。")
             return
 
-        colors_df = pd.read_excel(color_path)
-
-        # 1. Sort No で並び替え (念のためPython側でも)
-        df = df.sort_values("sort_no").reset_index(drop=True)
-
-        # 2. 日時整形
-        raw_dates = df["試合日時（日本時間）"].fillna("").astype(str)
-        df["datetime"] = pd.to_datetime(
-            raw_dates.str.replace(r"\s*\(.*\)", "", regex=True).str.strip(), errors="coerce"
-        )
-        if df["datetime"].dt.tz is not None:
-            df["datetime"] = df["datetime"].dt.tz_localize(None)
-
-        dt_str_list = []
-        for i, row in df.iterrows():
-            raw_val = str(row["試合日時（日本時間）"])
-            dt_obj = row["datetime"]
-            if pd.isna(dt_obj) or not raw_val or raw_val == "None":
-                dt_str_list.append("TBD")
-            elif "T" in raw_val or ":" in raw_val:
-                dt_str_list.append(dt_obj.strftime("%Y/%m/%d %H:%M"))
-            else:
-                dt_str_list.append(dt_obj.strftime("%Y/%m/%d") + " TBD")
-        df["datetime_str"] = dt_str_list
-
-        # 3. その他整形
-        df["result"] = df["win"].map({"Win": "W", "Lose": "L", "Draw": "D"}).fillna("-")
-        df["venue_class"] = df["home"].map({"Home": "home", "Away": "away"}).fillna("")
-        df["score"] = df["score"].fillna("-")
-        df["class"] = df["result"].map({"W": "win", "L": "loss", "D": "draw"}).fillna("upcoming")
-
-        future = df[(df["datetime"] > pd.Timestamp.today()) & (df["score"] == "-")]
-        if not future.empty:
-            df.loc[future["datetime"].idxmin(), "class"] = "next-game"
-
-        bye_mask = df["opponent"].str.upper() == "BYE"
-        df.loc[bye_mask, ["datetime_str", "score", "result"]] = ""
-        df.loc[bye_mask, "class"] = "bye"
-
-        colors_df = colors_df.rename(columns={"Team": "opponent", "Color 1": "bg", "Color 2": "fg"})
-        df = pd.merge(df, colors_df, on="opponent", how="left")
-        df["date"] = df["datetime"].dt.strftime("%Y/%m/%d")
-        df["time"] = df["datetime"].dt.strftime("%H:%M")
-
-        # HTML組み立て
-        full_html = build_schedule_record_bar(df)
-        pre_df = df[df["week"].astype(str).str.startswith("Pre")]
-        reg_df = df[~df["week"].astype(str).str.startswith("Pre") & ~df["week"].isin(POSTSEASON_WEEKS)]
-        post_df = df[df["week"].isin(POSTSEASON_WEEKS)]
-
-        full_html += '<div class="tab-buttons">'
-        tabs = [
-            ("Preseason", "PRE", "pre", pre_df),
-            ("Regular Season", "RS", "reg", reg_df),
-            ("Postseason", "POST", "post", post_df),
-        ]
-        for pc_lbl, sp_lbl, tid, d in tabs:
-            if tid == "post" and d.empty:
-                continue
-            full_html += f'<button class="tab-btn" data-sp="{sp_lbl}" data-target="{tid}">{pc_lbl}</button>'
-        full_html += "</div>"
-        for tid, d in [("pre", pre_df), ("reg", reg_df), ("post", post_df)]:
-            if tid == "post" and d.empty:
-                continue
-            full_html += f'<div class="tab-content" id="{tid}" style="display:none;">{build_pc_table(d)}{build_mobile_table(d)}</div>'
-
-        # JavaScript
-        full_html += """
-<script>
-document.addEventListener("DOMContentLoaded", function () {
-    const now = new Date();
-    const month = now.getMonth() + 1;
-    let defaultTab = "reg";
-
-    const hasPost = document.getElementById("post") !== null;
-    const hasPre = document.getElementById("pre") !== null;
-
-    if (month >= 5 && month <= 8 && hasPre) {
-        defaultTab = "pre";
-    } else if ((month === 1 || month === 2) && hasPost) {
-        defaultTab = "post";
-    } else if (!document.getElementById(defaultTab)) {
-        if (hasPost) defaultTab = "post";
-        else if (hasPre) defaultTab = "pre";
-    }
-
-    document.querySelectorAll(".tab-content").forEach(tab => {
-        tab.classList.remove("active");
-        tab.style.display = "none";
-    });
-    document.querySelectorAll(".tab-btn").forEach(btn => {
-        btn.classList.remove("active");
-        if (btn.dataset.target === defaultTab) {
-            btn.classList.add("active");
-        }
-    });
-
-    const defaultContent = document.getElementById(defaultTab);
-    if (defaultContent) {
-        defaultContent.style.display = "block";
-        defaultContent.classList.add("active");
-    }
-
-    document.querySelectorAll(".tab-btn").forEach(button => {
-        button.addEventListener("click", () => {
-            const target = button.dataset.target;
-            document.querySelectorAll(".tab-btn").forEach(btn => btn.classList.remove("active"));
-            button.classList.add("active");
-            document.querySelectorAll(".tab-content").forEach(tab => {
-                if (tab.id === target) {
-                    tab.style.display = "block";
-                    tab.classList.add("active");
-                } else {
-                    tab.classList.remove("active");
-                    tab.style.display = "none";
-                }
-            });
-        });
-    });
-});
-</script>"""
-
-        # メイン更新 (ページタイトルも自動で年度が入るように修正)
-        update_hatena(HATENA_SCHEDULE_PAGE_ID, f"SCHEDULE // {CURRENT_SEASON}", full_html)
-
-        # ヘッダー用Snippet更新
-        if HATENA_LATEST_SCHEDULE_PAGE_ID:
-            snippet_content = build_header_snippet_data(df)
-            update_hatena(HATENA_LATEST_SCHEDULE_PAGE_ID, "LATEST_DATA", snippet_content)
+        publish_assets()
+        publish_schedule(df)
 
         print("✨ すべての更新に成功したよ、しょう！")
     except Exception as e:
@@ -0,0 +1,251 @@
+import os
+import sys
+import time
+import random
+import inspect
+import argparse
+import tempfile
+import importlib
+from datetime import datetime, timedelta
+
+# ==============================================================================
+# 描画ベンチマーク
+#   Notion のページJSONと同じ形の合成データを作り、各ページの HTML 生成だけを計測する
+#   （Notion・はてなへの通信は行わない）。
+#
+#   python bench_render.py                      # 既定の件数で全ベンチマーク
+#   python bench_render.py roster --players 500 --repeat 20
+#   python bench_render.py --tree ../old-checkout   # 別のチェックアウトのコードで計測（比較用）
+#   python bench_render.py roster --render-cache     # 描画キャッシュ（render_cache）が効いた状態で計測
+#   python bench_render.py --scale 10               # 件数を10倍にして計測（複数シーズン分のアーカイブなど）
+#
+#   描画キャッシュは既定で無効にし、有効にした場合も一時ディレクトリを使う（.cache/render には書かない）。
+# ==============================================================================
+POSITIONS = ["QB", "RB", "WR", "TE", "OL", "DL", "EDGE", "LB", "CB", "S", "K", "P", "LS"]
+TEAMS = ["JAX", "HOU", "IND", "TEN", "BUF", "KC", "DAL", ""]
+
+
+def _title(v):
+    return {"type": "title", "title": [{"plain_text": v}] if v else []}
+
+def _text(v):
+    return {"type": "rich_text", "rich_text": [{"plain_text": v}] if v else []}
+
+def _number(v):
+    return {"type": "number", "number": v}
+
+def _select(v):
+    return {"type": "select", "select": {"name": v} if v else None}
+
+def _multi_select(values):
+    return {"type": "multi_select", "multi_select": [{"name": v} for v in values]}
+
+def _date(v):
+    return {"type": "date", "date": {"start": v} if v else None}
+
+def _status(v):
+    return {"type": "status", "status": {"name": v}}
+
+
+def roster_pages(n, seed=1):
+    """ロスターDBのページ（auto_roster / auto_cap 共通）を n 件"""
+    r = random.Random(seed)
+    pages = []
+    for i in range(n):
+        left = r.random() < 0.2
+        years = r.randint(1, 5)
+        props = {
+            "Name": _title(f"Player {i}"),
+            "#": _number(r.randint(0, 99)),
+            "Position": _multi_select(r.sample(POSITIONS, r.choice([1, 1, 2]))),
+            "Sub Position": _select(""),
+            "Status": _status("Left" if left else r.choice(["Active", "Active", "Active", "IR", "PS", "PUP"])),
+            "College": _select(r.choice(["Florida", "LSU", "Ohio St.", "Alabama", "Georgia"])),
+            "Height": _text(f"6-{r.randint(0, 7)}"),
+            "Weight": _number(r.randint(180, 330)),
+            "Date Of Birth": _date(f"{r.randint(1990, 2003)}-{r.randint(1, 12):02d}-{r.randint(1, 28):02d}"),
+            "Entering Year": _number(r.randint(2013, 2025)),
+            "Joining Year": _number(r.randint(2018, 2025)),
+            "Joining Style": _select(r.choice(["Draft", "UDFA", "UFA", "Trade", "Waiver"])),
+            "Draft Team": _select(r.choice(TEAMS)),
+            "Draft Round": _number(r.randint(1, 7) if r.random() < 0.7 else None),
+            "Draft Overall": _number(r.randint(1, 250)),
+            "Former Team": _select(r.choice(TEAMS)),
+            "Contract": _text(r.choice(["", "3yr/$10M", "1yr/$1.2M", "4yr/$80M"])),
+            "Cap Salary": _text(",".join(str(r.randint(8, 400) * 10000) for _ in range(years))),
+            "Actual Dead": _text(",".join(str(r.randint(0, 50) * 10000) for _ in range(2)) if left else ""),
+            "Potential Dead": _text(",".join(str(r.randint(0, 200) * 10000) for _ in range(years))),
+            "FA": _number(r.choice([2025, 2026, 2027, 2028, None])),
+            "Honors": _multi_select(r.choice([[], [], [], ["Pro Bowl"], ["All-Pro 1st", "Pro Bowl"]])),
+            "Leave": _number(r.choice([2024, 2025]) if left else None),
+            "Transactions": _text("2025/03/01|Signed\n2025/04/01|Restructured"),
+            "Stats - Passing (2024)": _text("Yds: 3000 / TD: 20" if i % 4 == 0 else ""),
+            "Stats - Rushing (2024)": _text("Att: 50 / Yds: 200" if i % 5 == 0 else ""),
+            "Combine": _text("40yd: 4.5 / Vert: 35"),
+        }
+        pages.append({"object": "page", "id": f"bench-{i:05d}", "properties": props})
+    return pages
+
+
+NEWS_TYPES = ["Contract", "Draft", "FA", "Injury", "News", "Roster Move", "Trade", "Coaching", "Awards"]
+
+
+def news_items(n, seed=1):
+    """fetch_news_from_notion の戻り値と同じ形のニュースを n 件"""
+    r = random.Random(seed)
+    return [
+        {
+            "date": f"2025/{r.randint(1, 12):02d}/{r.randint(1, 28):02d}",
+            "title": f"Jaguars news item {i} & <update>",
+            "type": r.choice(NEWS_TYPES),
+            "url": f"https://example.com/news/{i}" if i % 3 else None,
+        }
+        for i in range(n)
+    ]
+
+
+def schedule_rows(n, seed=1):
+    """fetch_from_notion の戻り値と同じ列の試合を n 件（プレシーズン3試合 + BYE を含む）"""
+    r = random.Random(seed)
+    teams = ["BUF", "HOU", "IND", "TEN", "KC", "DAL", "SF", "DET"]
+    rows = []
+    for i in range(n):
+        week = f"Pre {i + 1}" if i < 3 else f"Week {i - 2}"
+        bye = i == n // 2
+        played = i < n * 2 // 3
+        rows.append({
+            "week": week,
+            "opponent": "BYE" if bye else r.choice(teams),
+            "home": None if bye else r.choice(["Home", "Away"]),
+            "score": f"{r.randint(0, 40)}-{r.randint(0, 40)}" if played and not bye else None,
+            "win": r.choice(["Win", "Lose"]) if played and not bye else None,
+            "試合日時（日本時間）": None if bye else (datetime(2025, 8, 1) + timedelta(days=7 * i)).strftime("%Y-%m-%dT02:00:00.000+09:00"),
+            "sort_no": i + 1,
+        })
+    return rows
+
+
+# ==============================================================================
+# ベンチマーク本体（名前 -> 準備関数。準備関数は計測対象の引数なし関数を返す）
+# ==============================================================================
+def bench_roster(args):
+    auto_roster = importlib.import_module("auto_roster")
+    df = auto_roster.build_roster_df(roster_pages(args.players))
+    return lambda: auto_roster.generate_html_content(df)
+
+
+def bench_cap(args):
+    auto_cap = importlib.import_module("auto_cap")
+    players = auto_cap.parse_cap_players(roster_pages(args.players))
+    return lambda: auto_cap.generate_html_content(players, auto_cap.CONFIG)
+
+
+def bench_news(args):
+    auto_news = importlib.import_module("auto_news")
+    items = news_items(args.news)
+    return lambda: auto_news.generate_full_page_html(items)
+
+
+class Unsupported(Exception):
+    """--tree のチェックアウトにない機能を使うベンチマーク"""
+
+
+def bench_news_file(args):
+    """アーカイブページを文字列にせず、ファイルへ直接書き出す"""
+    auto_news = importlib.import_module("auto_news")
+    if "out" not in inspect.signature(auto_news.generate_full_page_html).parameters:
+        raise Unsupported("generate_full_page_html has no out parameter")
+    items = news_items(args.news)
+    out = tempfile.TemporaryFile("w+", encoding="utf-8")
+
+    def run():
+        out.seek(0)
+        out.truncate()
+        auto_news.generate_full_page_html(items, out=out)
+    return run
+
+
+def bench_schedule(args):
+    import pandas as pd
+    auto_schedule = importlib.import_module("auto_schedule")
+    # ヘッダー用Snippetも生成させる
+    auto_schedule.HATENA_LATEST_SCHEDULE_PAGE_ID = "bench"
+    df = auto_schedule.prepare_schedule_df(pd.DataFrame(schedule_rows(args.games)))
+    return lambda: auto_schedule.build_schedule_pages(df)
+
+
+BENCHMARKS = {
+    "roster": bench_roster,
+    "cap": bench_cap,
+    "news": bench_news,
+    "news-file": bench_news_file,
+    "schedule": bench_schedule,
+}
+
+
+def measure(fn, repeat):
+    """(最小, 中央値) 秒。1回目はウォームアップとして捨てる"""
+    fn()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return times[0], times[len(times) // 2]
+
+
+def run_benchmark(name, args):
+    """--tree のチェックアウトにない機能（out= など）を使うベンチマークは None"""
+    try:
+        fn = BENCHMARKS[name](args)
+    except Unsupported:
+        if not args.tree:
+            raise
+        return None
+    return measure(fn, args.repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render benchmarks (no network)")
+    parser.add_argument("names", nargs="*", metavar="NAME",
+                        help=f"benchmarks to run ({', '.join(BENCHMARKS)}; default: all)")
+    parser.add_argument("--players", type=int, default=100, help="roster size (default: 100)")
+    parser.add_argument("--news", type=int, default=300, help="news items (default: 300)")
+    parser.add_argument("--games", type=int, default=22, help="schedule rows (default: 22)")
+    parser.add_argument("--scale", type=int, default=1, help="multiply --players / --news / --games (default: 1)")
+    parser.add_argument("--repeat", type=int, default=10, help="timed runs per benchmark (default: 10)")
+    parser.add_argument("--tree", help="import the page modules from another checkout instead of this one")
+    parser.add_argument("--render-cache", action="store_true",
+                        help="keep the render cache on (timed runs after the warm-up are cache hits)")
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+
+    args.players, args.news, args.games = args.players * args.scale, args.news * args.scale, args.games * args.scale
+    if args.tree:
+        sys.path.insert(0, os.path.abspath(args.tree))
+    # render_cache は import 時に環境変数を読むので、ページのモジュールより先に設定する
+    os.environ["JN_RENDER_CACHE"] = "1" if args.render_cache else "0"
+    os.environ["JN_RENDER_CACHE_DIR"] = tempfile.mkdtemp(prefix="jn-bench-")
+
+    # 取得件数などのログは捨てる
+    stderr, sys.stderr = sys.stderr, open(os.devnull, "w")
+    try:
+        results = [(name, run_benchmark(name, args)) for name in args.names or BENCHMARKS]
+    finally:
+        sys.stderr.close()
+        sys.stderr = stderr
+
+    print(f"players={args.players} news={args.news} games={args.games} repeat={args.repeat}")
+    for name, timing in results:
+        if timing is None:
+            print(f"{name:<10} not supported by {args.tree}")
+            continue
+        best, median = timing
+        print(f"{name:<10} best {best * 1000:8.2f} ms   median {median * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
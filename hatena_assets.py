@@ -0,0 +1,130 @@
+import os
+import sys
+import html
+import hashlib
+from functools import lru_cache
+
+from hatena_publisher import Entry, update_entry
+
+# ==============================================================================
+# 静的アセット（JS・固定HTML）の共有配信
+#   assets/ 以下のファイルを1つの固定ページ（アセットページ）にまとめて公開し、
+#   各ページはバージョン付きの参照（プレースホルダ + 小さなローダー）だけを埋め込む。
+#   ローダーはアセットページを1回だけ取得して localStorage に保存するため、
+#   同じバージョンの間はロスター・キャップ・スケジュールのどのページでも再取得しない。
+#   取得方法は footer.html の /schedule-latest・/news-latest と同じ（fetch + DOMParser）。
+#
+#   HATENA_ASSET_PAGE_ID   : アセットページのエントリID
+#   HATENA_ASSET_PAGE_PATH : アセットページの公開パス（例: /jn-assets）
+#   どちらかが未設定の場合は、従来どおり各ページに直接埋め込む。
+# ==============================================================================
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+ASSET_PAGE_ID = (os.environ.get("HATENA_ASSET_PAGE_ID") or "").strip()
+ASSET_PAGE_PATH = (os.environ.get("HATENA_ASSET_PAGE_PATH") or "").strip()
+STORAGE_KEY = "jn-assets"
+
+ASSET_KINDS = {".js": "script", ".css": "style", ".html": "html"}
+
+LOADER_SCRIPT = """<script>
+(function () {
+    var VERSION = "%(version)s", URL = "%(path)s", KEY = "%(key)s";
+
+    function apply(assets) {
+        document.querySelectorAll("[data-jn-asset]").forEach(function (el) {
+            var asset = assets[el.dataset.jnAsset];
+            if (!asset) return;
+            if (asset.kind === "html") {
+                el.outerHTML = asset.text;
+            } else {
+                var node = document.createElement(asset.kind);
+                node.textContent = asset.text;
+                el.replaceWith(node);
+            }
+        });
+    }
+
+    var cached = null;
+    try { cached = JSON.parse(localStorage.getItem(KEY)); } catch (e) {}
+    if (cached && cached.version === VERSION) {
+        apply(cached.assets);
+        return;
+    }
+
+    fetch(URL).then(res => res.text()).then(html => {
+        const doc = new DOMParser().parseFromString(html, "text/html");
+        const root = doc.getElementById("jn-assets");
+        if (!root) return;
+        const assets = {};
+        root.querySelectorAll("textarea[data-asset]").forEach(el => {
+            assets[el.dataset.asset] = { kind: el.dataset.kind, text: el.textContent };
+        });
+        // アセットページの更新が遅れている場合は使うだけで保存しない
+        if (root.dataset.version === VERSION) {
+            try { localStorage.setItem(KEY, JSON.stringify({ version: VERSION, assets: assets })); } catch (e) {}
+        }
+        apply(assets);
+    }).catch(err => console.log("Asset fetch error", err));
+})();
+</script>"""
+
+
+def is_enabled():
+    return bool(ASSET_PAGE_ID and ASSET_PAGE_PATH)
+
+
+@lru_cache(maxsize=None)
+def load_assets():
+    """{アセット名: (種類, 内容)}（ファイル名順）"""
+    assets = {}
+    for name in sorted(os.listdir(ASSET_DIR)):
+        kind = ASSET_KINDS.get(os.path.splitext(name)[1])
+        if kind is None:
+            continue
+        with open(os.path.join(ASSET_DIR, name), "r", encoding="utf-8") as f:
+            assets[name] = (kind, f.read())
+    return assets
+
+
+@lru_cache(maxsize=None)
+def asset_version():
+    h = hashlib.sha256()
+    for name, (kind, text) in load_assets().items():
+        h.update(f"{name}\0{kind}\0{text}\0".encode("utf-8"))
+    return h.hexdigest()[:12]
+
+
+def asset_html(name):
+    """ページにアセットを配置する。アセットページが有効ならプレースホルダ、無効なら直接埋め込む"""
+    kind, text = load_assets()[name]
+    if is_enabled():
+        return f'<div data-jn-asset="{name}" hidden></div>'
+    if kind == "html":
+        return text
+    return f"<{kind}>\n{text}</{kind}>"
+
+
+def asset_loader():
+    """プレースホルダを置いたページの末尾に1つだけ入れる"""
+    if not is_enabled():
+        return ""
+    return LOADER_SCRIPT % {"version": asset_version(), "path": ASSET_PAGE_PATH, "key": STORAGE_KEY}
+
+
+def asset_page_html():
+    items = "\n".join(
+        f'<textarea data-asset="{name}" data-kind="{kind}">{html.escape(text, quote=False)}</textarea>'
+        for name, (kind, text) in load_assets().items()
+    )
+    return f'<div id="jn-assets" data-version="{asset_version()}" style="display:none;">\n{items}\n</div>'
+
+
+def asset_entry():
+    return Entry(ASSET_PAGE_ID, "JN_ASSETS", asset_page_html(), "assets")
+
+
+def publish_assets():
+    """アセットページを更新（内容が変わっていなければ何も送らない）。参照するページより先に呼ぶ"""
+    if not is_enabled():
+        return True
+    print(f"Assets version: {asset_version()}", file=sys.stderr)
+    return update_entry(asset_entry())
@@ -0,0 +1,391 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import threading
+from datetime import datetime, timezone
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from xml.sax.saxutils import escape, quoteattr
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+from html_minify import minify_html
+from hatena_state import (
+    content_digest, is_unchanged, mark_published,
+    get_metadata, save_metadata, invalidate_metadata, parse_entry_metadata,
+)
+
+# ==============================================================================
+# はてなブログ AtomPub 共通パブリッシャ
+#   auto_schedule / auto_news / auto_roster / auto_cap の固定ページ更新をここに集約する。
+#   Session を使い回して接続を再利用し、429・5xx・通信エラーはバックオフして再試行する。
+#   publish_entries() で複数ページを上限付きのスレッドプールから並列に PUT する。
+#   Entry.after に挙げたページがあるものは、それらがすべて成功してから送る（1つでも失敗したら送らない）。
+#   本文は送信前に縮小する（HATENA_MINIFY=0 で無効）。
+#
+#   HATENA_PUBLISH_MODE で送信方法を切り替える:
+#     direct  : その場で PUT する（既定）
+#     dry-run : PUT せず、生成したページを JN_OUTPUT_DIR に書き出す（manifest.json にサイズ・ダイジェスト）
+#     outbox  : dry-run と同じく書き出し、さらに outbox/ に積む。publish_outbox.py が後で送信する
+# ==============================================================================
+HATENA_USER = (os.environ.get("HATENA_USER") or "").strip()
+HATENA_BLOG = (os.environ.get("HATENA_BLOG") or "").strip()
+HATENA_API_KEY = (os.environ.get("HATENA_API_KEY") or "").strip()
+# HATENA_BASE_URL でローカルのスタンドインサーバー（standin_server.py）などに向けられる
+HATENA_BASE_URL = (os.environ.get("HATENA_BASE_URL") or "https://blog.hatena.ne.jp").rstrip("/")
+
+MAX_WORKERS = int(os.environ.get("HATENA_MAX_WORKERS") or 6)
+MAX_RETRIES = int(os.environ.get("HATENA_MAX_RETRIES") or 3)
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 20.0
+MINIFY = (os.environ.get("HATENA_MINIFY") or "1").strip().lower() not in ("0", "false", "no")
+
+PUBLISH_MODE = (os.environ.get("HATENA_PUBLISH_MODE") or "direct").strip().lower()
+OUTPUT_DIR = os.environ.get("JN_OUTPUT_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "output")
+OUTBOX_DIR = os.path.join(OUTPUT_DIR, "outbox")
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, "manifest.json")
+
+# 更新対象のページ
+#   title=None なら既存エントリのタイトルを維持、keep_categories=True なら既存のカテゴリを維持する。
+#   after は先に公開しておくページのラベル（ロスターのメインページが読み込むフラグメントなど）。
+Entry = namedtuple("Entry", ["entry_id", "title", "body", "label", "keep_categories", "after"], defaults=[False, ()])
+
+_session = None
+_session_lock = threading.Lock()
+_output_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=2, pool_maxsize=MAX_WORKERS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.auth = HTTPBasicAuth(HATENA_USER, HATENA_API_KEY)
+            _session = session
+        return _session
+
+
+def entry_url(entry_id):
+    return f"{HATENA_BASE_URL}/{HATENA_USER}/{HATENA_BLOG}/atom/page/{entry_id}"
+
+
+def _backoff_delay(attempt):
+    return min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+def _retry_after(resp, attempt):
+    """Retry-After の秒数（BACKOFF_MAX_SEC まで）。ない・読めない場合は指数バックオフ"""
+    try:
+        return min(BACKOFF_MAX_SEC, max(0.0, float(resp.headers.get("Retry-After"))))
+    except (TypeError, ValueError):
+        return _backoff_delay(attempt)
+
+
+def request(method, url, **kwargs):
+    """
+    429・5xx・通信エラーは再試行し、最後のレスポンスを返す。
+    429 は Retry-After（なければ指数バックオフ）、それ以外は指数バックオフ + ジッターで待つ。
+    """
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            resp = session.request(method, url, timeout=60, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_RETRIES:
+                raise
+            print(f"[RETRY] {method} {url}: {e}", file=sys.stderr)
+            delay = _backoff_delay(attempt)
+        else:
+            if attempt == MAX_RETRIES or (resp.status_code != 429 and resp.status_code < 500):
+                return resp
+            print(f"[RETRY] {method} {url}: HTTP {resp.status_code}", file=sys.stderr)
+            delay = _retry_after(resp, attempt) if resp.status_code == 429 else _backoff_delay(attempt)
+        time.sleep(delay)
+
+
+def fetch_metadata(entry_id):
+    """(タイトル, カテゴリ一覧)。キャッシュがなければ既存エントリを GET する"""
+    metadata = get_metadata(entry_id)
+    if metadata:
+        return metadata
+    url = entry_url(entry_id)
+    print(f"Fetching current entry info from {url}...", file=sys.stderr)
+    resp = request("GET", url)
+    resp.raise_for_status()
+    title, categories = parse_entry_metadata(resp.text)
+    save_metadata(entry_id, title, categories)
+    return title, categories
+
+
+def build_entry_xml(title, body, categories=()):
+    categories_xml = "\n".join(f"  <category term={quoteattr(c)} />" for c in categories)
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<entry xmlns="http://www.w3.org/2005/Atom"
+       xmlns:app="http://www.w3.org/2007/app">
+  <title>{escape(title)}</title>
+{categories_xml}
+  <content type="text/html">{escape(body)}</content>
+  <app:control>
+    <app:draft>no</app:draft>
+  </app:control>
+</entry>
+"""
+
+
+def minify_body(label, body):
+    minified = minify_html(body)
+    before, after = len(body.encode("utf-8")), len(minified.encode("utf-8"))
+    if before:
+        print(f"[MINIFY] {label}: {before:,} -> {after:,} bytes (-{before - after:,}, {100 * (before - after) / before:.1f}%)", file=sys.stderr)
+    return minified
+
+
+def update_entry(entry):
+    """1ページを更新（または書き出し）。成功（変更なしでスキップを含む）なら True"""
+    label = entry.label or entry.entry_id
+    if not entry.entry_id and PUBLISH_MODE != "dry-run":
+        print(f"[ERROR] {label}: entry ID is missing.", file=sys.stderr)
+        return False
+
+    body = entry.body
+    if MINIFY:
+        body = minify_body(label, body)
+
+    if PUBLISH_MODE in ("dry-run", "outbox"):
+        return write_output(entry, body)
+    return upload_entry(entry, body)
+
+
+def upload_entry(entry, body):
+    """縮小済みの本文を PUT する。前回と同じ内容ならスキップ"""
+    label = entry.label or entry.entry_id
+
+    # タイトルを既存エントリから引き継ぐページは本文だけで比較
+    digest = content_digest(body) if entry.title is None else content_digest(entry.title, body)
+    if is_unchanged(entry.entry_id, digest):
+        return True
+
+    title, categories = entry.title, []
+    if title is None or entry.keep_categories:
+        try:
+            current_title, current_categories = fetch_metadata(entry.entry_id)
+        except Exception as e:
+            print(f"[ERROR] {label}: failed to get current entry: {e}", file=sys.stderr)
+            return False
+        if title is None:
+            title = current_title
+        if entry.keep_categories:
+            categories = current_categories
+
+    xml_data = build_entry_xml(title, body, categories)
+    try:
+        resp = request("PUT", entry_url(entry.entry_id), data=xml_data.encode("utf-8"),
+                       headers={"Content-Type": "application/atom+xml"})
+    except requests.RequestException as e:
+        print(f"[ERROR] {label}: {e}", file=sys.stderr)
+        return False
+
+    if resp.status_code == 200:
+        print(f"Successfully updated: {label} ({title})", file=sys.stderr)
+        mark_published(entry.entry_id, digest)
+        return True
+
+    print(f"Failed to update {label}. Status: {resp.status_code}", file=sys.stderr)
+    print(resp.text, file=sys.stderr)
+    # エントリが削除・移動された可能性があるので、次回は取得し直す
+    if 400 <= resp.status_code < 500:
+        invalidate_metadata(entry.entry_id)
+    return False
+
+
+# ==============================================================================
+# 書き出し（dry-run / outbox）
+# ==============================================================================
+def _slug(label):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", str(label)).strip("-").lower() or "page"
+
+
+def _write_atomic(path, text):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def write_output(entry, body):
+    """ページを OUTPUT_DIR に書き出して manifest.json を更新。outbox モードでは送信待ちにも積む"""
+    label = entry.label or entry.entry_id
+    slug = _slug(label)
+    digest = content_digest(body) if entry.title is None else content_digest(entry.title, body)
+    record = {
+        "entry_id": entry.entry_id,
+        "title": entry.title,
+        "label": label,
+        "keep_categories": entry.keep_categories,
+        "after": list(entry.after),
+        "file": f"{slug}.html",
+        "bytes": len(body.encode("utf-8")),
+        "digest": digest,
+        "rendered_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+    with _output_lock:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        _write_atomic(os.path.join(OUTPUT_DIR, record["file"]), body)
+        try:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        manifest[slug] = record
+        _write_atomic(MANIFEST_PATH, json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True))
+
+        if PUBLISH_MODE == "outbox":
+            # 同じページの未送信分は最新の内容で置き換える
+            os.makedirs(OUTBOX_DIR, exist_ok=True)
+            _write_atomic(os.path.join(OUTBOX_DIR, f"{slug}.json"), json.dumps(dict(record, body=body), ensure_ascii=False))
+
+    print(f"[{PUBLISH_MODE}] {label}: {record['bytes']:,} bytes -> {record['file']}", file=sys.stderr)
+    return True
+
+
+def _read_outbox_item(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def outbox_items():
+    """送信待ちの (パス, Entry, 本文, ダイジェスト) を古い順に返す"""
+    try:
+        names = [n for n in os.listdir(OUTBOX_DIR) if n.endswith(".json")]
+    except OSError:
+        return []
+    stamped = []
+    for name in names:
+        try:
+            stamped.append((os.path.getmtime(os.path.join(OUTBOX_DIR, name)), name))
+        except OSError:
+            # 一覧を取った後に送信済みで消えたもの
+            continue
+    items = []
+    for _, name in sorted(stamped):
+        path = os.path.join(OUTBOX_DIR, name)
+        try:
+            item = _read_outbox_item(path)
+            entry = Entry(item["entry_id"], item["title"], None, item["label"], item["keep_categories"],
+                          tuple(item.get("after") or ()))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[ERROR] {name}: unreadable outbox item: {e}", file=sys.stderr)
+            continue
+        items.append((path, entry, item["body"], item.get("digest")))
+    return items
+
+
+def remove_outbox_item(path, digest):
+    """
+    送信済みの outbox 項目を消す。送信中に同じページが描き直されて置き換わっていた場合は、
+    新しい内容を次回送るために残す。消した場合は True
+    """
+    try:
+        current = _read_outbox_item(path)
+    except (OSError, ValueError):
+        return False
+    if current.get("digest") != digest:
+        print(f"[SKIP] {current.get('label') or path}: re-rendered while sending, kept in outbox", file=sys.stderr)
+        return False
+    try:
+        os.remove(path)
+    except OSError:
+        return False
+    return True
+
+
+class UploadQueue:
+    """
+    ページの送信をスレッドプールに流す。Entry.after のページがすべて成功するまでそのページは送らず、
+    1つでも失敗したら送らずに失敗扱いにする。after のページは先に submit しておくこと
+    （キューにないページは送信済みとみなす）。
+
+    queue = UploadQueue(pool)
+    queue.submit(entry)                     # update_entry(entry) で送る
+    queue.submit(entry, upload_entry, body)  # 送信関数と追加の引数を指定する
+    failed = queue.wait()                    # 全部終わるまで待ち、失敗したページのラベル一覧を返す
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.failed = []
+        self._results = {}
+        self._pending = []
+        self._running = {}
+        self._submitted = set()
+
+    def submit(self, entry, send=None, *args):
+        label = entry.label or entry.entry_id
+        after = [a for a in entry.after if a in self._submitted]
+        self._submitted.add(label)
+        self._pending.append((label, after, entry, send or update_entry, args))
+        self._collect(block=False)
+
+    def wait(self):
+        self._collect(block=True)
+        return self.failed
+
+    def _finish(self, label, ok):
+        self._results[label] = ok
+        if not ok:
+            self.failed.append(label)
+
+    def _dispatch(self):
+        dispatched = True
+        while dispatched:
+            dispatched = False
+            pending, self._pending = self._pending, []
+            for item in pending:
+                label, after, entry, send, args = item
+                results = [self._results.get(a) for a in after]
+                if any(ok is False for ok in results):
+                    print(f"[SKIP] {label}: not sent because {', '.join(a for a, ok in zip(after, results) if ok is False)} failed", file=sys.stderr)
+                    self._finish(label, False)
+                    dispatched = True
+                elif all(ok for ok in results):
+                    self._running[self.pool.submit(send, entry, *args)] = label
+                    dispatched = True
+                else:
+                    self._pending.append(item)
+
+    def _collect(self, block):
+        self._dispatch()
+        while self._running:
+            done, _ = wait(self._running, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+            if not done:
+                return
+            for future in done:
+                label = self._running.pop(future)
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"[ERROR] {label}: {e}", file=sys.stderr)
+                    ok = False
+                self._finish(label, ok)
+            self._dispatch()
+
+
+def publish_entries(entries, max_workers=MAX_WORKERS):
+    """複数ページを並列に（after の順序を守って）更新し、失敗したページのラベル一覧を返す"""
+    entries = list(entries)
+    if not entries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(entries))) as pool:
+        queue = UploadQueue(pool)
+        for entry in entries:
+            queue.submit(entry)
+        return queue.wait()
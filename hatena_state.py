@@ -0,0 +1,131 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+
+# ==============================================================================
+# はてなブログ 公開状態の記録
+#   前回 PUT した本文のダイジェストをエントリIDごとに保存し、
+#   生成結果が前回と同じなら PUT を省略する（Notion 側に変更がない回は何も送らない）。
+#   HATENA_FORCE_PUBLISH=1 で常に送信する。
+#   あわせて、既存エントリのタイトル・カテゴリもキャッシュし、PUT 前の GET を省く。
+# ==============================================================================
+STATE_DIR = os.environ.get("HATENA_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "hatena"
+)
+STATE_PATH = os.path.join(STATE_DIR, "published.json")
+FORCE_PUBLISH = (os.environ.get("HATENA_FORCE_PUBLISH") or "").strip().lower() in ("1", "true", "yes")
+# タイトル・カテゴリのキャッシュ有効期限（ブログ側で手動編集された場合に備えて、定期的に取り直す）
+METADATA_TTL_HOURS = float(os.environ.get("HATENA_METADATA_TTL_HOURS") or 24 * 7)
+
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def _load_state():
+    global _state
+    if _state is None:
+        try:
+            with open(STATE_PATH, "r", encoding="utf-8") as f:
+                _state = json.load(f)
+        except (OSError, ValueError):
+            _state = {}
+    return _state
+
+
+def _save_state(state):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, STATE_PATH)
+
+
+def content_digest(*parts):
+    """タイトル・本文などを連結した SHA-256"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def is_unchanged(entry_id, digest):
+    """前回公開時と同じ内容なら True（スキップしてよい）"""
+    if FORCE_PUBLISH or not entry_id:
+        return False
+    with _state_lock:
+        entry = _load_state().get(str(entry_id))
+    if entry and entry.get("digest") == digest:
+        print(f"[SKIP] {entry_id}: unchanged since {entry.get('published_at')}", file=sys.stderr)
+        return True
+    return False
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def mark_published(entry_id, digest):
+    """PUT 成功後に呼ぶ"""
+    if not entry_id:
+        return
+    with _state_lock:
+        state = _load_state()
+        state.setdefault(str(entry_id), {}).update({
+            "digest": digest,
+            "published_at": _now().isoformat(timespec="seconds"),
+        })
+        _save_state(state)
+
+
+# ==============================================================================
+# エントリのメタデータ（タイトル・カテゴリ）
+# ==============================================================================
+def parse_entry_metadata(xml_text):
+    """AtomPub のエントリXMLから (タイトル, カテゴリ一覧) を取り出す"""
+    root = ET.fromstring(xml_text)
+    title = root.find("atom:title", ATOM_NS).text
+    categories = [c.attrib["term"] for c in root.findall("atom:category", ATOM_NS)]
+    return title, categories
+
+
+def get_metadata(entry_id):
+    """キャッシュ済みの (タイトル, カテゴリ一覧)。未取得・期限切れなら None"""
+    with _state_lock:
+        meta = _load_state().get(str(entry_id), {}).get("metadata")
+    if not meta:
+        return None
+    try:
+        fetched_at = datetime.fromisoformat(meta["fetched_at"])
+    except (KeyError, ValueError):
+        return None
+    if _now() - fetched_at > timedelta(hours=METADATA_TTL_HOURS):
+        return None
+    return meta["title"], meta["categories"]
+
+
+def save_metadata(entry_id, title, categories):
+    if not entry_id:
+        return
+    with _state_lock:
+        state = _load_state()
+        state.setdefault(str(entry_id), {})["metadata"] = {
+            "title": title,
+            "categories": list(categories),
+            "fetched_at": _now().isoformat(timespec="seconds"),
+        }
+        _save_state(state)
+
+
+def invalidate_metadata(entry_id):
+    """PUT が 4xx で失敗したときなど、キャッシュが実態とずれている可能性がある場合に呼ぶ"""
+    with _state_lock:
+        state = _load_state()
+        if state.get(str(entry_id), {}).pop("metadata", None) is not None:
+            _save_state(state)
@@ -0,0 +1,74 @@
+import re
+
+# ==============================================================================
+# HTML 縮小（はてなへ送る前の後処理）
+#   テンプレートのインデント・改行とコメントを取り除く。
+#   - <script> / <style> / <pre> / <textarea> の中身は一切変更しない
+#   - タグ内（属性値）は変更しない
+#   - テキスト中の連続する空白は1文字にまとめる（表示上の意味は変わらない）
+#   - ブロック要素の前後の空白は表示に影響しないので削除する
+#   &nbsp; や U+00A0 は空白として扱わない。
+# ==============================================================================
+_RAW_TEXT_RE = re.compile(r"<(script|style|pre|textarea)\b(?:\"[^\"]*\"|'[^']*'|[^'\">])*>.*?</\1\s*>", re.I | re.S)
+_TOKEN_RE = re.compile(r"<!--.*?-->|<(?:\"[^\"]*\"|'[^']*'|[^'\">])*>|[^<]+|<", re.S)
+_TAG_NAME_RE = re.compile(r"</?([a-zA-Z][a-zA-Z0-9]*)")
+_SPACE_RE = re.compile(r"[ \t\r\n\f]+")
+
+# 前後の空白を消してもレイアウトが変わらない要素
+BLOCK_TAGS = frozenset("""
+    html head body title meta link base div section article aside header footer nav main
+    ul ol li dl dt dd table caption colgroup col thead tbody tfoot tr td th
+    p h1 h2 h3 h4 h5 h6 hr br blockquote figure figcaption details summary
+    form fieldset legend select option optgroup
+""".split())
+
+# はてなブログの「続きを読む」や条件付きコメントは残す
+_KEEP_COMMENT_RE = re.compile(r"<!--\s*(?:more|\[if|<!\[endif)", re.I)
+
+
+def _is_block(token):
+    if not token.startswith("<") or token.startswith("<!"):
+        return False
+    m = _TAG_NAME_RE.match(token)
+    return bool(m) and m.group(1).lower() in BLOCK_TAGS
+
+
+def _minify_markup(markup):
+    tokens = []
+    for token in _TOKEN_RE.findall(markup):
+        if token.startswith("<!--"):
+            if _KEEP_COMMENT_RE.match(token):
+                tokens.append(token)
+            continue
+        if not token.startswith("<") or token == "<":
+            token = _SPACE_RE.sub(" ", token)
+            # コメント除去で隣り合ったテキストはまとめる
+            if tokens and not tokens[-1].startswith("<"):
+                tokens[-1] = _SPACE_RE.sub(" ", tokens[-1] + token)
+                continue
+        tokens.append(token)
+    return tokens
+
+
+def minify_html(source):
+    """HTML 文字列を縮小して返す"""
+    tokens = []
+    pos = 0
+    for m in _RAW_TEXT_RE.finditer(source):
+        tokens.extend(_minify_markup(source[pos:m.start()]))
+        tokens.append(m.group(0))
+        pos = m.end()
+    tokens.extend(_minify_markup(source[pos:]))
+
+    out = []
+    for i, token in enumerate(tokens):
+        if token.startswith("<") and token != "<":
+            out.append(token)
+            continue
+        if i == 0 or _is_block(tokens[i - 1]):
+            token = token.lstrip(" ")
+        if i == len(tokens) - 1 or _is_block(tokens[i + 1]):
+            token = token.rstrip(" ")
+        if token:
+            out.append(token)
+    return "".join(out)
@@ -0,0 +1,150 @@
+import ast
+import string
+
+# ==============================================================================
+# HTML テンプレート
+#   "{name}" 形式のプレースホルダを持つ断片を、読み込み時に1回だけ f-string と同じ処理にコンパイルする。
+#   書式は str.format と同じ（"{cap:.1f}"・"{name!r}"、波括弧そのものは "{{" "}}"）。
+#   プレースホルダは描画時に渡す dict のキーで、属性・添字・位置引数は使えない。
+#
+#   ROW = Template('<li class="{cls}">{title}</li>')
+#   ROW.render({"cls": "news", "title": "..."})        # 1件
+#   ROW.join(rows)                                     # dict のリストを連結
+#   ROW.join_columns({"cls": [...], "title": [...]})   # 列ごとのリストから連結（件数が多いとき）
+#
+#   join_columns は各行を dict にせず、列を zip したタプルをそのまま f-string に渡すので最も速い。
+#   DataFrame なら df[列].tolist() を渡せばよい。
+#
+#   auto_*.py と Legend/ で同じマークアップを出す断片は、このモジュールの末尾に置いて共有する。
+#
+#   ページ全体は HtmlWriter に順に書き込んで組み立てる（str の += は使わない）。
+# ==============================================================================
+_formatter = string.Formatter()
+
+
+def _check_field(field, spec):
+    if not field or any(c in field for c in ".[") or field.isdigit():
+        raise ValueError(f"unsupported template field: {{{field}}}")
+    if spec and "{" in spec:
+        raise ValueError(f"nested format spec is not supported: {{{field}:{spec}}}")
+
+
+def _formatted(value, conversion, spec):
+    return ast.FormattedValue(
+        value=value,
+        conversion=ord(conversion) if conversion else -1,
+        format_spec=ast.JoinedStr(values=[ast.Constant(spec)]) if spec else None,
+    )
+
+
+def _name(id, ctx=ast.Load):
+    return ast.Name(id=id, ctx=ctx())
+
+
+def _lambda(arg, body):
+    args = ast.arguments(posonlyargs=[], args=[ast.arg(arg=arg)], vararg=None,
+                         kwonlyargs=[], kw_defaults=[], kwarg=None, defaults=[])
+    return ast.Lambda(args=args, body=body)
+
+
+def _compile(node, source):
+    expr = ast.fix_missing_locations(ast.Expression(body=node))
+    return eval(compile(expr, f"<template {source[:40]!r}>", "eval"), {})
+
+
+class Template:
+    def __init__(self, source):
+        self.source = source
+        self.fields = []
+        by_key, by_local = [], []
+        for literal, field, spec, conversion in _formatter.parse(source):
+            if literal:
+                by_key.append(ast.Constant(literal))
+                by_local.append(ast.Constant(literal))
+            if field is None:
+                continue
+            _check_field(field, spec)
+            if field not in self.fields:
+                self.fields.append(field)
+            row_value = ast.Subscript(value=_name("row"), slice=ast.Constant(field), ctx=ast.Load())
+            by_key.append(_formatted(row_value, conversion, spec))
+            by_local.append(_formatted(_name(f"_{self.fields.index(field)}"), conversion, spec))
+
+        # row -> f"..."
+        self.render = _compile(_lambda("row", ast.JoinedStr(values=by_key)), source)
+        # rows -> [f"..." for row in rows]
+        self._render_rows = _compile(_lambda("rows", ast.ListComp(
+            elt=ast.JoinedStr(values=by_key),
+            generators=[ast.comprehension(target=_name("row", ast.Store), iter=_name("rows"), ifs=[], is_async=0)],
+        )), source)
+        # columns -> [f"..." for (_0, _1, ...) in zip(*columns)]
+        target = ast.Tuple(elts=[_name(f"_{i}", ast.Store) for i in range(len(self.fields))], ctx=ast.Store())
+        rows = ast.Call(func=_name("zip"), args=[ast.Starred(value=_name("columns"), ctx=ast.Load())], keywords=[])
+        self._render_columns = _compile(_lambda("columns", ast.ListComp(
+            elt=ast.JoinedStr(values=by_local),
+            generators=[ast.comprehension(target=target, iter=rows, ifs=[], is_async=0)],
+        )), source)
+
+    def join(self, rows, sep=""):
+        return sep.join(self._render_rows(rows))
+
+    def render_columns(self, columns):
+        """{フィールド名: 値のリスト} から各行の文字列のリストを返す（リストの長さはそろえる）"""
+        return self._render_columns([columns[field] for field in self.fields])
+
+    def join_columns(self, columns, sep=""):
+        return sep.join(self.render_columns(columns))
+
+
+class HtmlWriter:
+    """ページの書き出し先。out を省略すると断片をリストに溜めて最後に1回だけ連結し、
+    out に write() を持つもの（ファイル・io.StringIO など）を渡すと断片をそのまま書き出す"""
+
+    def __init__(self, out=None):
+        self._parts = [] if out is None else None
+        self.write = self._parts.append if out is None else out.write
+
+    def writelines(self, parts):
+        for part in parts:
+            self.write(part)
+
+    def result(self):
+        """溜めた場合は連結した文字列、out に書き出した場合は None"""
+        return None if self._parts is None else "".join(self._parts)
+
+
+# ==============================================================================
+# 共通フラグメント
+# ==============================================================================
+TEAM_BADGE = Template('<span class="team-badge" style="background:{bg};color:{fg};">{opponent}</span>')
+
+# スケジュール表（PC）。opp は TEAM_BADGE または "BYE"
+SCHEDULE_PC_ROW = Template(
+    '<tr class="{class}"><th scope="row">{week}</th><td>{datetime_str}</td><td>{opp}</td>'
+    '<td class="venue {venue_class}">{home}</td><td>{score}</td><td>{result}</td></tr>'
+)
+
+# スケジュール表（モバイル）。sym は "vs" / "@"、result_tag は結果の <small> または ""
+SCHEDULE_MOBILE_ROW = Template(
+    '<tr class="{class}"><td>{week}</td><td>{date}<br><small>{time}</small></td>'
+    '<td><span class="venue {venue_class}">{sym}</span><span class="team-badge" style="background:{bg}; color:{fg};">{opponent}</span></td>'
+    '<td>{score}<br>{result_tag}</td></tr>'
+)
+SCHEDULE_MOBILE_BYE_ROW = Template('<tr class="{class}"><td>{week}</td><td></td><td>BYE</td><td></td></tr>')
+
+# ヘッダーのスコアバー。when は日時の表示（"9/8 (Sun) 02:00 JST" など）、result_score は "W 24-10" など
+SCORE_SLIDE = Template(
+    "<div class='schedule-slide {class}' data-date='{date_iso}'><div class='line1'><span class='week'>{week}</span>　{when}</div>"
+    "<div class='line2'><span class='opponent'><span class='venue {venue_class}'>{sym}</span>"
+    "<span class='team-badge' style='background:{bg};color:{fg};'>{opponent}</span></span>"
+    "<span class='result'>{result_score}</span></div></div>"
+)
+SCORE_SLIDE_BYE = Template(
+    "<div class='schedule-slide bye' data-date='{date_iso}'><div class='line1'><span class='week'>{week}</span></div>"
+    "<div class='line2'><span class='opponent'>BYE</span></div></div>"
+)
+
+# 戦績バーの項目（Division / Conf / Home / Streak など）
+RECORD_PILL = Template(
+    "<span class='{cls}'><span class='jax-record-label'>{label}</span> <span class='jax-record-num'>{num}</span></span>"
+)
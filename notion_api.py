@@ -0,0 +1,615 @@
+import os
+import sys
+import json
+import time
+import queue
+import itertools
+import random
+import hashlib
+import threading
+import requests
+from datetime import datetime, timedelta, timezone
+from requests.adapters import HTTPAdapter
+
+# ==============================================================================
+# Notion API 共通クライアント
+#   auto_schedule / auto_news / auto_roster / auto_cap から共有して使う。
+#   Session を使い回すことで、ページ送り・DBをまたいでも接続(TCP+TLS)を再利用する。
+# ==============================================================================
+NOTION_API_KEY = (os.environ.get("NOTION_TOKEN") or "").strip()
+NOTION_VERSION = "2022-06-28"
+# NOTION_API_BASE_URL でローカルのスタンドインサーバー（standin_server.py）などに向けられる
+NOTION_API_BASE = (os.environ.get("NOTION_API_BASE_URL") or "https://api.notion.com/v1").rstrip("/")
+
+# Notion のページサイズ上限
+MAX_PAGE_SIZE = 100
+
+# Notion API のレート制限（平均 3 リクエスト/秒）。並列取得時もプロセス全体でこの上限を守る。
+RATE_LIMIT_PER_SEC = float(os.environ.get("NOTION_RATE_LIMIT") or 3)
+
+# リトライ設定（429 は Retry-After に従い、5xx・通信エラーは指数バックオフ + ジッター）
+MAX_RETRIES = int(os.environ.get("NOTION_MAX_RETRIES") or 5)
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 30.0
+
+# 差分同期の設定
+#   NOTION_SYNC_MODE=incremental で有効。スナップショットは NOTION_CACHE_DIR に DB・クエリ（条件と取得プロパティ）ごとに保存する。
+#   差分クエリでは削除（アーカイブ）を検知できないため、一定時間ごとに全件取得し直す。
+SYNC_MODE = (os.environ.get("NOTION_SYNC_MODE") or "full").strip().lower()
+CACHE_DIR = os.environ.get("NOTION_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "notion"
+)
+FULL_SYNC_HOURS = float(os.environ.get("NOTION_FULL_SYNC_HOURS") or 24)
+# last_edited_time は分単位に丸められるため、前回同期時刻から少し遡って問い合わせる
+SYNC_OVERLAP = timedelta(minutes=2)
+
+# ページ送りのチェックポイント（途中で失敗した取得を、次回は失敗したページから再開する）
+#   CI は6時間おきに実行されるので、有効期限は実行間隔より十分長くし、1回失敗した次の実行で再開できるようにする。
+CHECKPOINT_DIR = os.path.join(CACHE_DIR, "checkpoints")
+CHECKPOINT_MAX_AGE_HOURS = float(os.environ.get("NOTION_CHECKPOINT_HOURS") or 15)
+
+_session = None
+_session_lock = threading.Lock()
+_schema_cache = {}
+_schema_lock = threading.Lock()
+
+
+class RateLimiter:
+    """スレッド間で共有する最小間隔方式のレートリミッタ"""
+
+    def __init__(self, rate_per_sec):
+        self.interval = 1.0 / rate_per_sec if rate_per_sec > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            wait_for = self._next_at - now
+            self._next_at = max(now, self._next_at) + self.interval
+        if wait_for > 0:
+            time.sleep(wait_for)
+
+    def pause(self, seconds):
+        """429 を受けたとき、全スレッドの次のリクエストを seconds 秒後まで遅らせる"""
+        with self._lock:
+            self._next_at = max(self._next_at, time.monotonic() + seconds)
+
+
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SEC)
+
+
+def get_session():
+    """keep-alive 付きの共有 Session を返す（初回のみ生成）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Authorization": f"Bearer {NOTION_API_KEY}",
+                "Notion-Version": NOTION_VERSION,
+                "Content-Type": "application/json",
+            })
+            _session = session
+    return _session
+
+
+def _backoff_delay(attempt):
+    return min(BACKOFF_MAX_SEC, BACKOFF_BASE_SEC * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+
+def _retry_after(resp, attempt):
+    try:
+        return float(resp.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return _backoff_delay(attempt)
+
+
+def request(method, url, **kwargs):
+    """
+    レート制限を守りながらリクエストし、429 / 5xx / 通信エラーはリトライする。
+    リトライしきれなかった場合は例外を送出する（途中までのデータで更新しないため）。
+    """
+    session = get_session()
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.wait()
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt)
+            print(f"[WARN] Notion request error ({e}), retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+            continue
+
+        if resp.status_code == 429 and attempt < MAX_RETRIES:
+            delay = _retry_after(resp, attempt) + random.uniform(0, 0.5)
+            print(f"[WARN] Notion rate limited, retrying in {delay:.1f}s", file=sys.stderr)
+            rate_limiter.pause(delay)
+            continue
+        if resp.status_code >= 500 and attempt < MAX_RETRIES:
+            delay = _backoff_delay(attempt)
+            print(f"[WARN] Notion API {resp.status_code}, retrying in {delay:.1f}s", file=sys.stderr)
+            time.sleep(delay)
+            continue
+
+        if resp.status_code != 200:
+            print(f"[ERROR] Notion API Failed: {resp.text}", file=sys.stderr)
+            resp.raise_for_status()
+        return resp
+
+
+def retrieve_database(db_id):
+    """データベースのスキーマ（プロパティ名 -> {id, type, ...}）を取得する（プロセス内でキャッシュ）"""
+    with _schema_lock:
+        if db_id in _schema_cache:
+            return _schema_cache[db_id]
+
+    resp = request("GET", f"{NOTION_API_BASE}/databases/{db_id}")
+    schema = resp.json().get("properties", {})
+    with _schema_lock:
+        _schema_cache[db_id] = schema
+    return schema
+
+
+def resolve_property_ids(db_id, properties):
+    """
+    取得したいプロパティ（名前のリスト、またはスキーマのプロパティ名リストを受け取って選ぶ関数）を
+    filter_properties 用のプロパティIDのリストに変換する。スキーマが取れない場合は None（全プロパティ取得）。
+    """
+    if properties is None:
+        return None
+    try:
+        schema = retrieve_database(db_id)
+    except requests.RequestException as e:
+        print(f"[WARN] Schema fetch failed, fetching all properties: {e}", file=sys.stderr)
+        return None
+
+    names = properties(list(schema)) if callable(properties) else [n for n in properties if n in schema]
+    return [schema[n]["id"] for n in names]
+
+
+# 型ごとに使えるフィルタ演算子（Notion API の仕様に合わせた一部のみ）
+_TEXT_OPERATORS = {"equals", "does_not_equal", "is_empty", "is_not_empty"}
+_FILTER_OPERATORS = {
+    "number": _TEXT_OPERATORS | {"greater_than", "less_than", "greater_than_or_equal_to", "less_than_or_equal_to"},
+    "rich_text": _TEXT_OPERATORS,
+    "title": _TEXT_OPERATORS,
+    "select": _TEXT_OPERATORS,
+    "status": _TEXT_OPERATORS,
+}
+
+
+def property_condition(db_id, prop_name, operator, value=True):
+    """
+    スキーマの型に合わせて1プロパティ分のフィルタ条件を組み立てる。
+    プロパティが無い・型が演算子に対応していない・スキーマが取れない場合は None。
+    """
+    try:
+        prop = retrieve_database(db_id).get(prop_name)
+    except requests.RequestException:
+        return None
+    if not prop:
+        return None
+
+    prop_type = prop.get("type")
+    if operator not in _FILTER_OPERATORS.get(prop_type, ()):
+        return None
+    if prop_type != "number" and operator not in ("is_empty", "is_not_empty"):
+        value = str(value)
+    return {"property": prop_name, prop_type: {operator: value}}
+
+
+def any_of(*conditions):
+    """条件を or でまとめる（どれか1つでも組み立てられなければ None = サーバー側で絞り込まない）"""
+    if not conditions or any(c is None for c in conditions):
+        return None
+    flat = []
+    for c in conditions:
+        flat.extend(c["or"] if "or" in c else [c])
+    return {"or": flat}
+
+
+# ==============================================================================
+# ページ送りのチェックポイント
+#   1ページ取得するごとに next_cursor と取得結果を JSONL に追記し、
+#   全件取得できたら削除する。失敗して残ったファイルは次回の同じクエリで再開に使う。
+# ==============================================================================
+def _checkpoint_path(url, payload):
+    key_src = json.dumps({"url": url, "payload": payload}, sort_keys=True)
+    return os.path.join(CHECKPOINT_DIR, hashlib.sha1(key_src.encode("utf-8")).hexdigest() + ".jsonl")
+
+
+def _load_checkpoint(path):
+    """チェックポイントの (取得済みページ数, 再開カーソル) を返す。無い・古い場合は (0, None)"""
+    try:
+        if time.time() - os.path.getmtime(path) > CHECKPOINT_MAX_AGE_HOURS * 3600:
+            os.remove(path)
+            return 0, None
+        count, cursor = 0, None
+        for results, next_cursor in _replay_checkpoint(path):
+            count += len(results)
+            cursor = next_cursor
+        return count, cursor
+    except (OSError, ValueError, KeyError):
+        return 0, None
+
+
+def _replay_checkpoint(path):
+    """チェックポイントに保存したバッチを1行ずつ読み出す"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            yield record["results"], record["next_cursor"]
+
+
+def _append_checkpoint(path, results, next_cursor):
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"next_cursor": next_cursor, "results": results}, ensure_ascii=False) + "\n")
+
+
+def _clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def iter_query_batches(db_id, payload=None, limit=None, properties=None):
+    """
+    databases/{id}/query を next_cursor でページ送りしながら、1レスポンス分（最大100ページ）ずつ yield する。
+    limit を指定した場合はその件数に達した時点で打ち切る。
+    properties を指定した場合は filter_properties でそのプロパティだけを取得する。
+    全件取得（limit なし）はチェックポイントを取り、失敗した場合は次回そのページから再開する。
+    """
+    url = f"{NOTION_API_BASE}/databases/{db_id}/query"
+    property_ids = resolve_property_ids(db_id, properties)
+    if property_ids:
+        # プロパティIDはURLエンコード済みの文字列で返ってくるため、そのまま連結する
+        url += "?" + "&".join(f"filter_properties={pid}" for pid in property_ids)
+
+    base_payload = dict(payload or {})
+    checkpoint = _checkpoint_path(url, base_payload) if limit is None else None
+
+    resumed_count, next_cursor = _load_checkpoint(checkpoint) if checkpoint else (0, None)
+    if next_cursor:
+        print(f"[RESUME] Resuming {db_id} query after {resumed_count} fetched pages", file=sys.stderr)
+
+    # 再開時に前回と今回で同じページが重複した場合に備えて、ページIDで重複を除く
+    seen = set() if next_cursor else None
+    yielded = 0
+    while True:
+        body = dict(base_payload)
+        remaining = None if limit is None else limit - yielded
+        body["page_size"] = min(MAX_PAGE_SIZE, remaining) if remaining is not None else MAX_PAGE_SIZE
+        if next_cursor:
+            body["start_cursor"] = next_cursor
+
+        try:
+            data = request("POST", url, json=body).json()
+        except requests.HTTPError as e:
+            # 再開用カーソルが無効になっていた場合は最初から取り直す（まだ何も yield していない）
+            if resumed_count and not yielded and e.response is not None and e.response.status_code == 400:
+                print("[RESUME] Checkpoint cursor rejected, restarting from the first page", file=sys.stderr)
+                _clear_checkpoint(checkpoint)
+                resumed_count, next_cursor, seen = 0, None, None
+                continue
+            raise
+
+        # 再開カーソルが有効と分かってから、チェックポイントの取得済みページを先に流す
+        if resumed_count and not yielded:
+            for results, _ in _replay_checkpoint(checkpoint):
+                seen.update(p["id"] for p in results)
+                yielded += len(results)
+                yield results
+
+        page_results = data.get("results", [])
+        next_cursor = data.get("next_cursor")
+        has_more = data.get("has_more", False) and next_cursor
+        if checkpoint and has_more:
+            _append_checkpoint(checkpoint, page_results, next_cursor)
+
+        if seen is not None:
+            page_results = [p for p in page_results if not (p["id"] in seen or seen.add(p["id"]))]
+        if limit is not None:
+            page_results = page_results[:limit - yielded]
+        yielded += len(page_results)
+        yield page_results
+
+        if not has_more or (limit is not None and yielded >= limit):
+            break
+
+    if checkpoint:
+        _clear_checkpoint(checkpoint)
+
+
+def query_database(db_id, payload=None, limit=None, properties=None):
+    """iter_query_batches の結果をページのリストにまとめて返す"""
+    return [page for batch in iter_query_batches(db_id, payload, limit, properties) for page in batch]
+
+
+_PREFETCH_DONE = object()
+
+
+def prefetch(iterable, depth=1):
+    """
+    iterable を別スレッドで depth 個先まで読み進める。
+    ページ送りに使うと、次のバッチをダウンロードしている間に現在のバッチをデコードできる。
+    """
+    buffer = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        buffer.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put((_PREFETCH_DONE, None))
+        except BaseException as e:
+            buffer.put((_PREFETCH_DONE, e))
+
+    worker = threading.Thread(target=produce, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _PREFETCH_DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def iter_pages(db_id, payload=None, properties=None):
+    """
+    ページを1件ずつ yield する。全件取得モードでは次のバッチを先読みしながら流し、
+    yield したページはバッチから取り除くので、デコード済みの生JSONはすぐに解放される。
+    差分同期モードではスナップショットから流す。
+    """
+    if SYNC_MODE == "incremental":
+        yield from sync_database(db_id, payload, properties)
+        return
+
+    for batch in prefetch(iter_query_batches(db_id, payload, properties=properties)):
+        batch.reverse()
+        while batch:
+            yield batch.pop()
+
+
+# ==============================================================================
+# 差分同期（ローカルスナップショット + last_edited_time フィルタ）
+# ==============================================================================
+def _snapshot_path(db_id, key):
+    # 同じDBでも条件・取得プロパティが違うクエリ（auto_roster と auto_cap など）は別のスナップショットにする
+    return os.path.join(CACHE_DIR, f"{db_id}-{key[:16]}.json")
+
+
+def _query_key(payload, property_ids):
+    key_src = {"payload": payload or {}, "properties": property_ids}
+    return hashlib.sha1(json.dumps(key_src, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _load_snapshot(db_id, key):
+    try:
+        with open(_snapshot_path(db_id, key), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_snapshot(db_id, snapshot):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _snapshot_path(db_id, snapshot["query_key"])
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def sync_database(db_id, payload=None, properties=None):
+    """
+    ローカルスナップショット（ページID -> ページ）を last_edited_time で差分更新して全ページを返す。
+    差分クエリは payload の filter を使わずに取得するため、スナップショットは payload の
+    条件より広い集合になりうる（呼び出し側の絞り込みは残しておくこと）。
+    """
+    now = datetime.now(timezone.utc)
+    # 取得プロパティが変わった場合もスナップショットを作り直す
+    property_ids = resolve_property_ids(db_id, properties)
+    key = _query_key(payload, property_ids)
+    snapshot = _load_snapshot(db_id, key)
+
+    needs_full = (
+        snapshot is None
+        or snapshot.get("query_key") != key
+        or now - _parse_time(snapshot["full_synced_at"]) > timedelta(hours=FULL_SYNC_HOURS)
+    )
+
+    if needs_full:
+        print(f"[SYNC] Full sync of {db_id}", file=sys.stderr)
+        pages = {page["id"]: page for page in query_database(db_id, payload, properties=properties)}
+        full_synced_at = now.isoformat()
+        # チェックポイントから再開した場合、取得済みのページは最大 CHECKPOINT_MAX_AGE_HOURS 前のものなので、
+        # 次回の差分はその分遡って問い合わせる
+        synced_at = now - timedelta(hours=CHECKPOINT_MAX_AGE_HOURS)
+    else:
+        since = _parse_time(snapshot["synced_at"]) - SYNC_OVERLAP
+        delta_payload = {
+            "filter": {
+                "timestamp": "last_edited_time",
+                "last_edited_time": {"on_or_after": since.isoformat()},
+            }
+        }
+        changed = query_database(db_id, delta_payload, properties=properties)
+        pages = snapshot["pages"]
+        for page in changed:
+            if page.get("archived") or page.get("in_trash"):
+                pages.pop(page["id"], None)
+            else:
+                pages[page["id"]] = page
+        full_synced_at = snapshot["full_synced_at"]
+        synced_at = now
+        print(f"[SYNC] {len(changed)} changed pages merged into {db_id} snapshot", file=sys.stderr)
+
+    _save_snapshot(db_id, {
+        "query_key": key,
+        "synced_at": synced_at.isoformat(),
+        "full_synced_at": full_synced_at,
+        "pages": pages,
+    })
+    return list(pages.values())
+
+
+# ==============================================================================
+# スキーマからコンパイルしたプロパティ抽出関数
+#   get_property_value は1回ごとに型を判定するため、DBスキーマ（または最初のページ）から
+#   列ごとの専用関数を1度だけ作り、ページを列ごとのリストへ直接展開する。
+# ==============================================================================
+def _compile_extractor(name, prop_type):
+    """name 列を取り出す専用関数を返す（型が想定と違うページは get_property_value にフォールバック）"""
+
+    def fallback(props):
+        return get_property_value({"properties": props}, name)
+
+    if prop_type == "title":
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != "title": return fallback(props)
+            items = prop["title"]
+            return items[0]["plain_text"] if items else ""
+    elif prop_type == "rich_text":
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != "rich_text": return fallback(props)
+            items = prop["rich_text"]
+            return "".join([t["plain_text"] for t in items]) if items else ""
+    elif prop_type == "number":
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != "number": return fallback(props)
+            value = prop["number"]
+            return value if value is not None else ""
+    elif prop_type in ("select", "status"):
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != prop_type: return fallback(props)
+            option = prop[prop_type]
+            return option["name"] if option else ""
+    elif prop_type == "multi_select":
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != "multi_select": return fallback(props)
+            options = prop["multi_select"]
+            return ",".join([o["name"] for o in options]) if options else ""
+    elif prop_type == "date":
+        def extract(props):
+            prop = props.get(name)
+            if prop is None: return ""
+            if prop.get("type") != "date": return fallback(props)
+            value = prop["date"]
+            return value["start"] if value else ""
+    elif prop_type is None:
+        # スキーマに無い列は常に空文字
+        def extract(props):
+            return fallback(props) if name in props else ""
+    else:
+        extract = fallback
+    return extract
+
+
+def compile_extractors(schema, fields):
+    """スキーマ（プロパティ名 -> {"type": ...}）から、fields の各列の抽出関数のタプルを作る"""
+    return tuple(_compile_extractor(name, (schema.get(name) or {}).get("type")) for name in fields)
+
+
+def extract_columns(pages, fields, schema=None, with_ids=False):
+    """
+    ページを列ごとのリスト {列名: [値, ...]} に展開する。
+    fields は列名のリスト、またはスキーマのプロパティ名リストを受け取って列名を返す関数。
+    schema を省略した場合は最初のページのプロパティ（型情報付き）をスキーマとして使う。
+    with_ids=True の場合は "id" 列にページIDも入れる。
+    """
+    pages = iter(pages)
+    first = next(pages, None)
+    if schema is None:
+        schema = first.get("properties", {}) if first is not None else {}
+    names = fields(list(schema)) if callable(fields) else list(fields)
+
+    extractors = compile_extractors(schema, names)
+    columns = tuple([] for _ in names)
+    pairs = tuple(zip(extractors, [col.append for col in columns]))
+    ids = []
+
+    if first is not None:
+        for page in itertools.chain((first,), pages):
+            props = page.get("properties", {})
+            for extract, append in pairs:
+                append(extract(props))
+            if with_ids:
+                ids.append(page["id"])
+
+    result = dict(zip(names, columns))
+    if with_ids:
+        result["id"] = ids
+    return result
+
+
+def get_property_value(page, prop_name):
+    """ページのプロパティを型に応じてプレーンな値に変換（存在しない・空の場合は ""）"""
+    props = page.get("properties", {})
+    if prop_name not in props: return ""
+
+    prop = props[prop_name]
+    prop_type = prop.get("type")
+
+    try:
+        if prop_type == "title":
+            return prop["title"][0]["plain_text"] if prop["title"] else ""
+        elif prop_type == "rich_text":
+            return "".join([t["plain_text"] for t in prop["rich_text"]]) if prop["rich_text"] else ""
+        elif prop_type == "number":
+            return prop["number"] if prop["number"] is not None else ""
+        elif prop_type == "select":
+            return prop["select"]["name"] if prop["select"] else ""
+        elif prop_type == "status":
+            return prop["status"]["name"] if prop["status"] else ""
+        elif prop_type == "multi_select":
+            return ",".join([s["name"] for s in prop["multi_select"]]) if prop["multi_select"] else ""
+        elif prop_type == "date":
+            return prop["date"]["start"] if prop["date"] else ""
+        elif prop_type == "url":
+            return prop["url"] if prop["url"] else ""
+        elif prop_type == "email":
+            return prop["email"] if prop["email"] else ""
+        elif prop_type == "checkbox":
+            return prop["checkbox"]
+        elif prop_type == "formula":
+            formula = prop["formula"]
+            value = formula.get(formula.get("type"))
+            if isinstance(value, dict):
+                return value.get("start") or ""
+            return value if value is not None else ""
+    except:
+        return ""
+    return ""
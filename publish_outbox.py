@@ -0,0 +1,51 @@
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import hatena_publisher
+
+# ==============================================================================
+# outbox の送信
+#   HATENA_PUBLISH_MODE=outbox で生成されたページ（JN_OUTPUT_DIR/outbox/*.json）を
+#   はてなブログへ並列に送信する。送信に成功した（または前回から変更がない）ものは outbox から消し、
+#   失敗したものは残して次回に再送する。after のページ（ロスターのフラグメントなど）が失敗したページは送らずに残す。
+#
+#   HATENA_PUBLISH_MODE=outbox python auto_all.py   # 生成のみ
+#   python publish_outbox.py                         # 送信のみ
+# ==============================================================================
+
+def drain(max_workers=hatena_publisher.MAX_WORKERS):
+    """outbox を空にする。失敗したページのラベル一覧を返す"""
+    items = hatena_publisher.outbox_items()
+    if not items:
+        print("Outbox is empty.", file=sys.stderr)
+        return []
+
+    # after のあるページ（ロスターのメインページなど）は、待つ相手より後に積む
+    items.sort(key=lambda item: bool(item[1].after))
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        queue = hatena_publisher.UploadQueue(pool)
+        for path, entry, body, digest in items:
+            queue.submit(entry, send, path, body, digest)
+        return queue.wait()
+
+
+def send(entry, path, body, digest):
+    """1件送信し、成功したら outbox から消す（送信中に描き直されたものは残す）"""
+    ok = hatena_publisher.upload_entry(entry, body)
+    if ok:
+        hatena_publisher.remove_outbox_item(path, digest)
+    return ok
+
+
+def main():
+    started = time.perf_counter()
+    failed = drain()
+    print(f"Done in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    if failed:
+        print(f"[ERROR] failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
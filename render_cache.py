@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import hashlib
+
+# ==============================================================================
+# 描画キャッシュ
+#   行ごとの入力のダイジェストをキーに、描画済みの HTML 断片を .cache/render/<名前>.json に保存する。
+#   前回と入力が同じ行はキャッシュの断片をそのまま使い、変わった行だけ描画し直す。
+#   version（テンプレートや組み立て関数から作る）が変わったらキャッシュ全体を捨てる。
+#   保存するのは今回使ったキーだけなので、いなくなった行は次の保存で消える。
+#   .cache は CI で actions/cache から復元されるので、読み込んでもコードが実行されない JSON で保存する（pickle は使わない）。
+#   ダイジェストは値を型付きで JSON にしてから取る（NaN と文字列 "nan"、1 と "1" を区別する）。
+#
+#   JN_RENDER_CACHE=0      : キャッシュを使わない（常に全件描画）
+#   JN_RENDER_CACHE_DIR    : 保存先（既定: .cache/render）
+# ==============================================================================
+CACHE_DIR = os.environ.get("JN_RENDER_CACHE_DIR") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "render"
+)
+ENABLED = (os.environ.get("JN_RENDER_CACHE") or "1").strip().lower() not in ("0", "false", "no")
+
+
+def _tagged(value):
+    """JSON にできない値（numpy の整数・日付など）は型名付きの repr にする"""
+    return {type(value).__name__: repr(value)}
+
+
+def row_digest(values):
+    """1行分の入力値のダイジェスト"""
+    encoded = json.dumps(list(values), ensure_ascii=False, default=_tagged)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def _update_code(h, code):
+    h.update(code.co_code)
+    for const in code.co_consts:
+        # 内包表記などの入れ子のコードは repr にアドレスが入るので中身で数える
+        if hasattr(const, "co_code"):
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode("utf-8"))
+
+
+def code_version(*parts):
+    """テンプレート（source）と組み立て関数（コード）から作るバージョン文字列"""
+    h = hashlib.sha256()
+    for part in parts:
+        code = getattr(part, "__code__", None)
+        if code is not None:
+            _update_code(h, code)
+        else:
+            h.update(str(getattr(part, "source", part)).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+class FragmentCache:
+    def __init__(self, name, version):
+        self.name = name
+        self.version = version
+        self.path = os.path.join(CACHE_DIR, f"{name}.json")
+        self.hits = 0
+        self.misses = 0
+        self._stored = self._load()
+        self._used = {}
+
+    def _load(self):
+        if not ENABLED:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != self.version:
+            return {}
+        fragments = data.get("fragments")
+        if not isinstance(fragments, dict):
+            return {}
+        return {k: v for k, v in fragments.items() if isinstance(v, str)}
+
+    def get(self, key):
+        """キャッシュ済みの断片。なければ None（put で登録する）"""
+        fragment = self._stored.get(key)
+        if fragment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._used[key] = fragment
+        return fragment
+
+    def put(self, key, fragment):
+        self._used[key] = fragment
+
+    def save(self):
+        """今回使った断片だけを保存する。内容が前回と同じなら書き込まない"""
+        if not ENABLED or self._used == self._stored:
+            return
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "fragments": self._used}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._stored = dict(self._used)
+
+    def report(self):
+        if not ENABLED:
+            print(f"[CACHE] {self.name}: disabled", file=sys.stderr)
+            return
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        print(f"[CACHE] {self.name}: {self.hits}/{total} hits ({rate:.1f}%)", file=sys.stderr)
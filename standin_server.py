@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Notion / はてなブログ AtomPub のローカル・スタンドインサーバー（オフラインでの計測・回帰確認用）
+
+  # 1. 本番の Notion DB を記録（NOTION_TOKEN が必要）
+  python standin_server.py record --out fixtures DB_ID [DB_ID ...]
+
+  # 2. 記録したレスポンスを再生（遅延・429 を注入可能）
+  python standin_server.py serve --fixtures fixtures --port 8765 --latency 150 --rate-429 0.05
+
+  # 3. auto_*.py をスタンドインに向ける
+  NOTION_API_BASE_URL=http://127.0.0.1:8765/v1 HATENA_BASE_URL=http://127.0.0.1:8765 python auto_all.py
+
+fixtures/notion/{DB_ID}.json に {"properties": スキーマ, "pages": [ページ, ...]} を保存し、
+databases/{id}/query ではページ送り・filter・sorts・filter_properties を再現する。
+はてな側は GET / PUT を受け付け、PUT された本文は fixtures/hatena/{ENTRY_ID}.xml に保存する。
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import signal
+import argparse
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+from xml.sax.saxutils import escape
+
+from notion_api import get_property_value
+
+NOTION_DB_RE = re.compile(r"^/v1/databases/([^/]+)$")
+NOTION_QUERY_RE = re.compile(r"^/v1/databases/([^/]+)/query$")
+HATENA_PAGE_RE = re.compile(r"^/([^/]+)/([^/]+)/atom/page/([^/]+)$")
+
+
+# ==============================================================================
+# 1. Notion クエリの再現（filter / sorts / filter_properties / ページ送り）
+# ==============================================================================
+def _as_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_time(value):
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _compare(value, operator, arg):
+    """Notion のフィルタ条件1つを評価（よく使う演算子のみ）"""
+    empty = value in ("", None) or value == []
+    if operator == "is_empty":
+        return empty == bool(arg)
+    if operator == "is_not_empty":
+        return (not empty) == bool(arg)
+    if operator in ("equals", "does_not_equal"):
+        num, num_arg = _as_number(value), _as_number(arg)
+        same = (num == num_arg) if num is not None and num_arg is not None else str(value) == str(arg)
+        return same if operator == "equals" else not same
+    if operator == "contains":
+        return str(arg) in str(value)
+    if operator == "does_not_contain":
+        return str(arg) not in str(value)
+    if empty:
+        return False
+    if operator in ("greater_than", "less_than", "greater_than_or_equal_to", "less_than_or_equal_to"):
+        a, b = _as_number(value), _as_number(arg)
+        if a is None or b is None:
+            return False
+    elif operator in ("after", "before", "on_or_after", "on_or_before"):
+        a, b = _as_time(value), _as_time(arg)
+        if a is None or b is None:
+            return False
+        if a.tzinfo is None and b.tzinfo is not None:
+            b = b.replace(tzinfo=None)
+        elif a.tzinfo is not None and b.tzinfo is None:
+            a = a.replace(tzinfo=None)
+    else:
+        return True
+    return {
+        "greater_than": a > b if operator == "greater_than" else None,
+        "less_than": a < b if operator == "less_than" else None,
+        "greater_than_or_equal_to": a >= b if operator == "greater_than_or_equal_to" else None,
+        "less_than_or_equal_to": a <= b if operator == "less_than_or_equal_to" else None,
+        "after": a > b if operator == "after" else None,
+        "before": a < b if operator == "before" else None,
+        "on_or_after": a >= b if operator == "on_or_after" else None,
+        "on_or_before": a <= b if operator == "on_or_before" else None,
+    }[operator]
+
+
+def matches(page, flt):
+    if not flt:
+        return True
+    if "and" in flt:
+        return all(matches(page, f) for f in flt["and"])
+    if "or" in flt:
+        return any(matches(page, f) for f in flt["or"])
+    if "timestamp" in flt:
+        name = flt["timestamp"]
+        operator, arg = next(iter(flt[name].items()))
+        return _compare(page.get(name), operator, arg)
+
+    name = flt["property"]
+    cond_type = next(k for k in flt if k != "property")
+    operator, arg = next(iter(flt[cond_type].items()))
+    return _compare(get_property_value(page, name), operator, arg)
+
+
+def sort_pages(pages, sorts):
+    # 後ろのキーから順に安定ソートして、先頭のキーを最優先にする
+    for s in reversed(sorts or []):
+        name = s.get("property") or s.get("timestamp")
+        reverse = s.get("direction") == "descending"
+
+        def key(page, name=name, is_timestamp="timestamp" in s):
+            value = page.get(name) if is_timestamp else get_property_value(page, name)
+            num = _as_number(value)
+            return (value in ("", None), num if num is not None else str(value))
+
+        filled = [p for p in pages if not key(p)[0]]
+        blank = [p for p in pages if key(p)[0]]
+        pages = sorted(filled, key=key, reverse=reverse) + blank
+    return pages
+
+
+def project(page, schema, property_ids):
+    if not property_ids:
+        return page
+    # parse_qs がデコードした ID と比べるので、スキーマ側（Notion はURLエンコード済みの ID を返す）もデコードする
+    names = {name for name, prop in schema.items() if unquote(prop.get("id") or "") in property_ids}
+    projected = dict(page)
+    projected["properties"] = {k: v for k, v in page.get("properties", {}).items() if k in names}
+    return projected
+
+
+# ==============================================================================
+# 2. HTTP ハンドラ
+# ==============================================================================
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "JNStandIn/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    # --- 共通 ---
+    def _inject(self):
+        """遅延と 429 の注入。429 を返した場合は True"""
+        server = self.server
+        with server.stats_lock:
+            server.stats["requests"] += 1
+        if server.latency_ms:
+            time.sleep(server.latency_ms / 1000.0 * random.uniform(0.8, 1.2))
+        if server.rate_429 and random.random() < server.rate_429:
+            with server.stats_lock:
+                server.stats["429"] += 1
+            self._send_json(429, {"object": "error", "status": 429, "code": "rate_limited"},
+                            headers={"Retry-After": str(server.retry_after)})
+            return True
+        return False
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status, obj, headers=None):
+        self._send(status, json.dumps(obj, ensure_ascii=False).encode("utf-8"), "application/json", headers)
+
+    def _not_found(self):
+        self._send_json(404, {"object": "error", "status": 404, "code": "object_not_found"})
+
+    # --- ルーティング ---
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if self._inject():
+            return
+        m = NOTION_DB_RE.match(path)
+        if m:
+            return self._notion_database(m.group(1))
+        m = HATENA_PAGE_RE.match(path)
+        if m:
+            return self._hatena_get(m.group(3))
+        self._not_found()
+
+    def do_POST(self):
+        parsed = urlparse(self.path)
+        body = self._body()
+        if self._inject():
+            return
+        m = NOTION_QUERY_RE.match(parsed.path)
+        if m:
+            return self._notion_query(m.group(1), json.loads(body or b"{}"), parse_qs(parsed.query))
+        self._not_found()
+
+    def do_PUT(self):
+        path = urlparse(self.path).path
+        body = self._body()
+        if self._inject():
+            return
+        m = HATENA_PAGE_RE.match(path)
+        if m:
+            return self._hatena_put(m.group(3), body)
+        self._not_found()
+
+    # --- Notion ---
+    def _notion_database(self, db_id):
+        db = self.server.load_db(db_id)
+        if db is None:
+            return self._not_found()
+        self._send_json(200, {"object": "database", "id": db_id, "properties": db["properties"]})
+
+    def _notion_query(self, db_id, payload, query):
+        db = self.server.load_db(db_id)
+        if db is None:
+            return self._not_found()
+
+        pages = [p for p in db["pages"] if matches(p, payload.get("filter"))]
+        pages = sort_pages(pages, payload.get("sorts"))
+
+        try:
+            start = int(payload.get("start_cursor") or 0)
+        except ValueError:
+            return self._send_json(400, {"object": "error", "status": 400, "code": "validation_error"})
+        size = min(int(payload.get("page_size") or 100), 100)
+        chunk = pages[start:start + size]
+        has_more = start + size < len(pages)
+
+        property_ids = set(query.get("filter_properties", []))
+        with self.server.stats_lock:
+            self.server.stats["notion_pages"] += len(chunk)
+        self._send_json(200, {
+            "object": "list",
+            "results": [project(p, db["properties"], property_ids) for p in chunk],
+            "has_more": has_more,
+            "next_cursor": str(start + size) if has_more else None,
+        })
+
+    # --- はてなブログ AtomPub ---
+    def _hatena_get(self, entry_id):
+        xml = self.server.hatena_entries.get(entry_id)
+        if xml is None:
+            xml = (
+                '<?xml version="1.0" encoding="utf-8"?>'
+                '<entry xmlns="http://www.w3.org/2005/Atom" xmlns:app="http://www.w3.org/2007/app">'
+                f"<title>{escape(entry_id)}</title><category term=\"Jaguars\" />"
+                '<content type="text/html"></content></entry>'
+            ).encode("utf-8")
+        with self.server.stats_lock:
+            self.server.stats["hatena_get"] += 1
+        self._send(200, xml, "application/atom+xml")
+
+    def _hatena_put(self, entry_id, body):
+        self.server.hatena_entries[entry_id] = body
+        with self.server.stats_lock:
+            self.server.stats["hatena_put"] += 1
+            self.server.stats["hatena_put_bytes"] += len(body)
+        if self.server.fixtures_dir:
+            out_dir = os.path.join(self.server.fixtures_dir, "hatena")
+            os.makedirs(out_dir, exist_ok=True)
+            with open(os.path.join(out_dir, f"{entry_id}.xml"), "wb") as f:
+                f.write(body)
+        self._send(200, body, "application/atom+xml")
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir, latency_ms=0, rate_429=0.0, retry_after=1, verbose=False):
+        super().__init__(address, StandInHandler)
+        self.fixtures_dir = fixtures_dir
+        self.latency_ms = latency_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.hatena_entries = {}
+        self.stats = {"requests": 0, "429": 0, "notion_pages": 0, "hatena_get": 0, "hatena_put": 0, "hatena_put_bytes": 0}
+        self.stats_lock = threading.Lock()
+        self._dbs = {}
+
+    def load_db(self, db_id):
+        if db_id not in self._dbs:
+            path = os.path.join(self.fixtures_dir or "", "notion", f"{db_id}.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._dbs[db_id] = json.load(f)
+            except OSError:
+                return None
+        return self._dbs[db_id]
+
+
+# ==============================================================================
+# 3. 記録（本番 Notion から fixtures を作る）
+# ==============================================================================
+def record(out_dir, db_ids):
+    from notion_api import retrieve_database, query_database
+
+    notion_dir = os.path.join(out_dir, "notion")
+    os.makedirs(notion_dir, exist_ok=True)
+    for db_id in db_ids:
+        schema = retrieve_database(db_id)
+        pages = query_database(db_id)
+        with open(os.path.join(notion_dir, f"{db_id}.json"), "w", encoding="utf-8") as f:
+            json.dump({"properties": schema, "pages": pages}, f, ensure_ascii=False)
+        print(f"Recorded {len(pages)} pages from {db_id}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="本番の Notion DB を fixtures に記録する")
+    rec.add_argument("--out", default="fixtures")
+    rec.add_argument("db_ids", nargs="+")
+
+    srv = sub.add_parser("serve", help="記録した fixtures を再生する")
+    srv.add_argument("--fixtures", default="fixtures")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("--latency", type=float, default=0, help="1リクエストあたりの遅延 (ms)")
+    srv.add_argument("--rate-429", type=float, default=0.0, help="429 を返す確率 (0-1)")
+    srv.add_argument("--retry-after", type=int, default=1, help="429 の Retry-After (秒)")
+    srv.add_argument("--verbose", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "record":
+        record(args.out, args.db_ids)
+        return
+
+    server = StandInServer((args.host, args.port), args.fixtures, args.latency, args.rate_429, args.retry_after, args.verbose)
+    print(f"Stand-in server on http://{args.host}:{args.port} (fixtures: {args.fixtures})", file=sys.stderr)
+    # バックグラウンド実行（SIGINT が無視される）でも kill で集計を出して終了できるように
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(server.stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
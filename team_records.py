@@ -0,0 +1,105 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# JAX の戦績（通算・地区・カンファレンス・NFC・ホーム/アウェイ・連勝/連敗）
+#   auto_schedule と Legend/ のスケジュール・スコアバーが共有する。
+#   対戦相手のカンファレンス・地区は TEAM_TABLE から一括で引き、
+#   「どの集計に入る試合か」の行列と勝敗の one-hot 行列の積1回で全集計を出す
+#   （地区戦はカンファレンス戦にも入るので、試合を1つのグループに分ける groupby では表せない）。
+#
+#   splits = record_splits(schedule_df)   # week / opponent / home / win 列
+#   splits.overall, splits.division, ...   # "10-7" / "3-2-1"。該当する試合がなければ ""
+# ==============================================================================
+
+# チーム → (カンファレンス, ディビジョン)
+TEAM_INFO = {
+    "JAX": ("AFC", "South"),
+    "HOU": ("AFC", "South"),
+    "IND": ("AFC", "South"),
+    "TEN": ("AFC", "South"),
+    "BUF": ("AFC", "East"),
+    "MIA": ("AFC", "East"),
+    "NYJ": ("AFC", "East"),
+    "NE": ("AFC", "East"),
+    "BAL": ("AFC", "North"),
+    "PIT": ("AFC", "North"),
+    "CLE": ("AFC", "North"),
+    "CIN": ("AFC", "North"),
+    "KC": ("AFC", "West"),
+    "LAC": ("AFC", "West"),
+    "DEN": ("AFC", "West"),
+    "LV": ("AFC", "West"),
+    "PHI": ("NFC", "East"),
+    "DAL": ("NFC", "East"),
+    "NYG": ("NFC", "East"),
+    "WAS": ("NFC", "East"),
+    "GB": ("NFC", "North"),
+    "MIN": ("NFC", "North"),
+    "CHI": ("NFC", "North"),
+    "DET": ("NFC", "North"),
+    "TB": ("NFC", "South"),
+    "NO": ("NFC", "South"),
+    "ATL": ("NFC", "South"),
+    "CAR": ("NFC", "South"),
+    "SF": ("NFC", "West"),
+    "SEA": ("NFC", "West"),
+    "LAR": ("NFC", "West"),
+    "ARI": ("NFC", "West"),
+}
+TEAM_TABLE = pd.DataFrame.from_dict(TEAM_INFO, orient="index", columns=["conf", "div"])
+JAX_CONF, JAX_DIV = "AFC", "South"
+
+# ポストシーズンの識別子（Notion の Week 列と一致させる）
+POSTSEASON_WEEKS = ["WC", "DIV", "CONF", "SB"]
+
+RESULTS = ["Win", "Lose", "Draw"]
+RESULT_CODES = {"Win": "W", "Lose": "L", "Draw": "D"}
+
+# games: 集計したレギュラーシーズンの試合数、streak_code / streak_count: 直近の連続結果（"W", 3 など）
+RecordSplits = namedtuple(
+    "RecordSplits",
+    ["games", "overall", "division", "conference", "nfc", "home", "away", "streak_code", "streak_count"],
+)
+
+
+def regular_season_mask(df):
+    week = df["week"].astype(str)
+    return ~week.str.startswith("Pre") & ~df["week"].isin(POSTSEASON_WEEKS)
+
+
+def format_record(wins, losses, ties):
+    return f"{int(wins)}-{int(losses)}" + (f"-{int(ties)}" if ties > 0 else "")
+
+
+def record_splits(df, win_col="win", home_col="home"):
+    """レギュラーシーズンの決着済みの試合（行順）から各戦績を集計する"""
+    played = df[regular_season_mask(df) & df[win_col].isin(RESULTS)]
+    win = played[win_col].to_numpy(dtype=object)
+    if not len(win):
+        return RecordSplits(0, "", "", "", "", "", "", "", 0)
+
+    teams = TEAM_TABLE.reindex(played["opponent"].astype(str).to_numpy())
+    conf, div = teams["conf"].to_numpy(dtype=object), teams["div"].to_numpy(dtype=object)
+    home = played[home_col].to_numpy(dtype=object)
+
+    # (集計 × 試合) と (試合 × 勝敗) の積で、集計ごとの勝・敗・分の数
+    in_conf = conf == JAX_CONF
+    membership = np.array([
+        np.ones(len(win), dtype=bool),
+        in_conf & (div == JAX_DIV),
+        in_conf,
+        conf == "NFC",
+        home == "Home",
+        home == "Away",
+    ], dtype=np.int64)
+    outcome = np.array([win == r for r in RESULTS], dtype=np.int64).T
+    counts = membership @ outcome
+    records = [format_record(*c) if c.any() else "" for c in counts]
+
+    # 最後の試合と違う結果が最後に出た位置から後ろが連続記録
+    breaks = np.flatnonzero(win != win[-1])
+    streak_count = len(win) - (breaks[-1] + 1 if len(breaks) else 0)
+    return RecordSplits(len(win), *records, RESULT_CODES[win[-1]], int(streak_count))
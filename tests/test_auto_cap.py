@@ -0,0 +1,76 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from auto_cap import CapPlayers, cap_scenarios
+
+M = 1000000
+CONFIG = {"CURRENT_YEAR": 2025, "MIN_SALARY_MILLION": 1.0}
+
+
+def players(*rows):
+    """(ユニット, FA年, Cap Salary, Potential Dead) の行から CapPlayers を作る（単位は $M）"""
+    width = max(len(cap) for _, _, cap, _ in rows)
+
+    def matrix(values):
+        return np.array([list(v) + [0] * (width - len(v)) for v in values], dtype=np.int64) * M
+
+    return CapPlayers(
+        np.array([f"p{i}" for i in range(len(rows))], dtype=object),
+        np.array([f"Player {i}" for i in range(len(rows))], dtype=object),
+        np.array(["QB"] * len(rows), dtype=object),
+        np.array([unit for unit, _, _, _ in rows], dtype=object),
+        np.array([fa for _, fa, _, _ in rows], dtype=np.int64),
+        matrix([cap for _, _, cap, _ in rows]),
+        matrix([[0] * width for _ in rows]),
+        matrix([pot for _, _, _, pot in rows]),
+    )
+
+
+# 3年契約（2025-2027）: 按分ボーナスは毎年 $2M
+THREE_YEARS = ("Offense", 2028, [10, 12, 14], [6, 4, 2])
+
+
+def test_cut_charges_all_potential_dead():
+    s = cap_scenarios(players(THREE_YEARS), CONFIG)
+    assert s.cut_savings[0].tolist() == [4 * M, 8 * M, 12 * M]
+    assert s.cut_dead[0].tolist() == [6 * M, 4 * M, 2 * M]
+
+
+def test_post_june1_defers_remaining_bonus():
+    s = cap_scenarios(players(THREE_YEARS), CONFIG)
+    # 当年はその年の按分 $2M だけ、残りは翌年
+    assert s.june1_dead[0].tolist() == [2 * M, 2 * M, 2 * M]
+    assert s.june1_dead_next[0].tolist() == [4 * M, 2 * M, 0]
+    assert s.june1_savings[0].tolist() == [8 * M, 10 * M, 12 * M]
+
+
+def test_restructure_spreads_over_remaining_years():
+    s = cap_scenarios(players(THREE_YEARS), CONFIG)
+    # 2025: 基本給 10 - 2 = 8、最低年俸 1 を残して 7 を3年で按分 -> 当年は 7 - 7 // 3
+    # 2026: 基本給 12 - 2 = 10、9 を2年で按分 -> 9 - 4.5
+    # 2027: 最終年は按分先がないので節約なし
+    assert s.restructure_savings[0].tolist() == [7 * M - 7 * M // 3, 9 * M - 9 * M // 2, 0]
+
+
+def test_potential_dead_above_cap():
+    # Potential Dead がキャップを上回る（カットすると損）
+    s = cap_scenarios(players(("Defense", 2027, [1, 1], [5, 3])), CONFIG)
+    assert s.cut_savings[0].tolist() == [-4 * M, -2 * M]
+    # 当年の按分は Cap Salary を上限にする（5 - 3 = 2 -> 1）
+    assert s.june1_dead[0].tolist() == [1 * M, 1 * M]
+    assert s.june1_dead_next[0].tolist() == [4 * M, 2 * M]
+    assert s.june1_savings[0].tolist() == [0, 0]
+    # 基本給がないのでリストラクチャーできない
+    assert s.restructure_savings[0].tolist() == [0, 0]
+
+
+def test_outside_contract_is_zero():
+    s = cap_scenarios(players(("Offense", 2026, [5, 5], [2, 1]), ("Dead", 2099, [3], [3])), CONFIG)
+    # FA年（2026）以降と退団者は対象外
+    assert s.under_contract.tolist() == [[True, False], [False, False]]
+    assert s.cut_savings[:, 1].tolist() == [0, 0]
+    assert s.cut_dead[1].tolist() == [0, 0]
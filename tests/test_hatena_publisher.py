@@ -0,0 +1,110 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hatena_publisher
+import publish_outbox
+from hatena_publisher import Entry
+
+FRAGMENTS = [Entry("FQB", "ROSTER_QB_DATA", "<qb>", "roster QB"), Entry("FWR", "ROSTER_WR_DATA", "<wr>", "roster WR")]
+MAIN = Entry("R", None, "<main>", "roster page", True, ("roster QB", "roster WR"))
+
+
+def fake_upload(fail=()):
+    """送った順に label を記録し、fail の label だけ失敗させる upload_entry"""
+    sent, lock = [], threading.Lock()
+
+    def upload(entry, body):
+        with lock:
+            sent.append(entry.label)
+        return entry.label not in fail
+    return sent, upload
+
+
+def use_outbox(monkeypatch, tmp_path):
+    monkeypatch.setattr(hatena_publisher, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(hatena_publisher, "OUTBOX_DIR", str(tmp_path / "outbox"))
+    monkeypatch.setattr(hatena_publisher, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(hatena_publisher, "PUBLISH_MODE", "outbox")
+    monkeypatch.setattr(hatena_publisher, "MINIFY", False)
+
+
+def test_main_page_waits_for_fragments(monkeypatch):
+    sent, upload = fake_upload()
+    monkeypatch.setattr(hatena_publisher, "upload_entry", upload)
+    monkeypatch.setattr(hatena_publisher, "PUBLISH_MODE", "direct")
+
+    assert hatena_publisher.publish_entries(FRAGMENTS + [MAIN]) == []
+    assert sent[-1] == "roster page"
+    assert sorted(sent[:-1]) == ["roster QB", "roster WR"]
+
+
+def test_failed_fragment_blocks_main_page(monkeypatch):
+    sent, upload = fake_upload(fail={"roster WR"})
+    monkeypatch.setattr(hatena_publisher, "upload_entry", upload)
+    monkeypatch.setattr(hatena_publisher, "PUBLISH_MODE", "direct")
+
+    failed = hatena_publisher.publish_entries(FRAGMENTS + [MAIN])
+    assert "roster page" not in sent
+    assert sorted(failed) == ["roster WR", "roster page"]
+
+
+def test_outbox_keeps_main_page_when_fragment_fails(monkeypatch, tmp_path):
+    use_outbox(monkeypatch, tmp_path)
+    # メインページを先に積んでも、フラグメントの後に送られる
+    for entry in [MAIN] + FRAGMENTS:
+        assert hatena_publisher.update_entry(entry)
+
+    sent, upload = fake_upload(fail={"roster QB"})
+    monkeypatch.setattr(hatena_publisher, "upload_entry", upload)
+    failed = publish_outbox.drain()
+
+    assert "roster page" not in sent
+    assert sorted(failed) == ["roster QB", "roster page"]
+    assert sorted(os.listdir(tmp_path / "outbox")) == ["roster-page.json", "roster-qb.json"]
+
+
+def test_drain_keeps_page_rendered_during_upload(monkeypatch, tmp_path):
+    use_outbox(monkeypatch, tmp_path)
+    hatena_publisher.update_entry(Entry("S", "SCHEDULE", "<old>", "schedule"))
+
+    sent = []
+    def upload(entry, body):
+        # 送信中に同じページが描き直されて outbox が置き換わる
+        hatena_publisher.update_entry(Entry("S", "SCHEDULE", "<new>", "schedule"))
+        sent.append(body)
+        return True
+    monkeypatch.setattr(hatena_publisher, "upload_entry", upload)
+
+    assert publish_outbox.drain() == []
+    assert sent == ["<old>"]
+    [(_, _, body, _)] = hatena_publisher.outbox_items()
+    assert body == "<new>"
+
+
+def test_outbox_items_skips_file_removed_while_listing(monkeypatch, tmp_path):
+    use_outbox(monkeypatch, tmp_path)
+    for entry in FRAGMENTS:
+        hatena_publisher.update_entry(entry)
+
+    getmtime = os.path.getmtime
+    def vanishing(path):
+        if path.endswith("roster-qb.json"):
+            raise FileNotFoundError(path)
+        return getmtime(path)
+    monkeypatch.setattr(os.path, "getmtime", vanishing)
+
+    assert [entry.label for _, entry, _, _ in hatena_publisher.outbox_items()] == ["roster WR"]
+
+
+class FakeResponse:
+    def __init__(self, retry_after):
+        self.headers = {"Retry-After": retry_after} if retry_after is not None else {}
+
+
+def test_retry_after_is_capped():
+    assert hatena_publisher._retry_after(FakeResponse("3"), 0) == 3.0
+    assert hatena_publisher._retry_after(FakeResponse("3600"), 0) == hatena_publisher.BACKOFF_MAX_SEC
+    assert hatena_publisher._retry_after(FakeResponse(None), 0) <= hatena_publisher.BACKOFF_BASE_SEC
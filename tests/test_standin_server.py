@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import threading
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from standin_server import StandInServer, project
+
+# Notion と同じく、記号を含むプロパティIDはURLエンコード済みの文字列で持つ
+SCHEMA = {
+    "Name": {"id": "title", "type": "title"},
+    "Position": {"id": "%3AUPp", "type": "multi_select"},
+    "Height": {"id": "a%7Bb%5D", "type": "rich_text"},
+    "Weight": {"id": "wGt1", "type": "number"},
+}
+PAGE = {
+    "object": "page",
+    "id": "page-1",
+    "properties": {
+        "Name": {"type": "title", "title": [{"plain_text": "Player"}]},
+        "Position": {"type": "multi_select", "multi_select": [{"name": "QB"}]},
+        "Height": {"type": "rich_text", "rich_text": [{"plain_text": "6-4"}]},
+        "Weight": {"type": "number", "number": 220},
+    },
+}
+
+
+def test_project_matches_encoded_property_ids():
+    # parse_qs でデコードされた後の ID
+    projected = project(PAGE, SCHEMA, {":UPp", "a{b]"})
+    assert set(projected["properties"]) == {"Position", "Height"}
+
+
+def test_replay_keeps_encoded_property_ids(tmp_path):
+    os.makedirs(tmp_path / "notion")
+    with open(tmp_path / "notion" / "DB.json", "w", encoding="utf-8") as f:
+        json.dump({"properties": SCHEMA, "pages": [PAGE]}, f)
+
+    server = StandInServer(("127.0.0.1", 0), str(tmp_path))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # notion_api.iter_pages と同じく、エンコード済みの ID をそのまま連結する
+        query = "&".join(f"filter_properties={SCHEMA[n]['id']}" for n in ("Name", "Position", "Height"))
+        req = urllib.request.Request(
+            f"http://127.0.0.1:{server.server_address[1]}/v1/databases/DB/query?{query}",
+            data=b"{}", method="POST", headers={"Content-Type": "application/json"},
+        )
+        with urllib.request.urlopen(req) as res:
+            results = json.load(res)["results"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert set(results[0]["properties"]) == {"Name", "Position", "Height"}
+    assert results[0]["properties"]["Position"]["multi_select"] == [{"name": "QB"}]